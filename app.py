@@ -1,14 +1,55 @@
 from __future__ import annotations
 
+import json
+import os
 import re
+import time
 from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple
 
 import streamlit as st
 
-import io_json
-from models import MapModel, Part, Relationship, Trailhead
-from session_state import init_session_state, get_map, set_map, get_issues, set_issues
-from validate import ValidationError
+from ifs_mapper import io_json, jobs
+from ifs_mapper.diff import diff_maps
+from ifs_mapper.models import MapModel, Part, Relationship, Trailhead
+from ifs_mapper.validate import ValidationError
+from session_state import (
+    COMPACT_SESSION,
+    add_dev_payload,
+    add_dev_timing,
+    begin_dev_rerun,
+    end_dev_rerun,
+    EXPORT_BLOCKED,
+    EXPORT_FAILED,
+    export_blocked,
+    export_failed,
+    get_cached_export,
+    get_cached_export_gz,
+    get_compare_result,
+    get_dev_history,
+    get_export_job,
+    get_import_job,
+    get_issues,
+    get_map,
+    get_map_generation,
+    get_round_trip_status,
+    init_session_state,
+    last_import_file_id,
+    release_map_views,
+    release_uploaded_file,
+    session_memory_report,
+    set_cached_export,
+    set_cached_export_gz,
+    set_compare_result,
+    set_export_failure,
+    set_export_job,
+    set_import_job,
+    set_issues,
+    set_last_import_file_id,
+    set_map,
+    uploader_key,
+)
 
 
 st.set_page_config(page_title="IFS Parts Mapper (V1)", layout="wide")
@@ -16,6 +57,16 @@ st.set_page_config(page_title="IFS Parts Mapper (V1)", layout="wide")
 CATEGORY_ORDER = ["Manager", "Firefighter", "Exile", "SelfLike", "Other"]
 REL_TYPE_ORDER = ["protects", "polarized_with"]
 
+# Developer-only rerun profiler. Off unless the local environment sets
+# IFS_MAPPER_DEV_PROFILE=1; records timings and byte counts only.
+DEV_PROFILE_ENABLED = os.environ.get("IFS_MAPPER_DEV_PROFILE", "") == "1"
+
+# Uploads / maps at or above these sizes are imported / exported on a worker
+# thread (see jobs.py); smaller ones run inline as before.
+BACKGROUND_IMPORT_MIN_BYTES = 512 * 1024
+BACKGROUND_EXPORT_MIN_ELEMENTS = 5000
+JOB_POLL_SECONDS = 0.5
+
 
 def _cat_rank(cat: str) -> int:
     try:
@@ -31,6 +82,30 @@ def _rel_type_rank(t: str) -> int:
         return 999
 
 
+@contextmanager
+def _dev_timed(name: str) -> Iterator[None]:
+    if not DEV_PROFILE_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_dev_timing(name, time.perf_counter() - t0)
+
+
+def _dev_payload(value: Any) -> None:
+    # Approximate size handed to the frontend; computed only in dev mode.
+    if not DEV_PROFILE_ENABLED:
+        return
+    if isinstance(value, bytes):
+        add_dev_payload(len(value))
+    elif isinstance(value, str):
+        add_dev_payload(len(value.encode("utf-8")))
+    else:
+        add_dev_payload(len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")))
+
+
 def _safe_filename_component(s: str) -> str:
     s2 = re.sub(r"[^A-Za-z0-9_-]+", "_", s.strip())
     return s2[:80] if s2 else "map"
@@ -129,18 +204,10 @@ def _render_issues() -> None:
 
 
 def _round_trip_status(m: MapModel) -> str:
-    try:
-        exported = io_json.export_map_to_json_text(m, indent=2)
-        m2 = io_json.import_map_from_json_text(exported)
-        ok = (
-            m2.schema_version == m.schema_version
-            and len(m2.parts) == len(m.parts)
-            and len(m2.relationships) == len(m.relationships)
-            and m2.map_id == m.map_id
-        )
-        return "PASS" if ok else "FAIL"
-    except Exception:
-        return "FAIL"
+    # Computed once per map generation alongside the export bytes (on the
+    # worker for large maps); "PENDING" until that export finishes.
+    _prepare_export(m)
+    return get_round_trip_status() or "PENDING"
 
 
 def _render_integrity_panel() -> None:
@@ -155,15 +222,15 @@ def _render_integrity_panel() -> None:
         polarized_pairs = sum(1 for r in m.relationships if r.type == "polarized_with")
         rt = _round_trip_status(m)
 
-        st.write(
-            {
-                "schema_version": m.schema_version,
-                "parts_count": len(m.parts),
-                "relationships_count": len(m.relationships),
-                "polarized_pairs_count": polarized_pairs,
-                "round_trip_export_import": rt,
-            }
-        )
+        summary = {
+            "schema_version": m.schema_version,
+            "parts_count": len(m.parts),
+            "relationships_count": len(m.relationships),
+            "polarized_pairs_count": polarized_pairs,
+            "round_trip_export_import": rt,
+        }
+        _dev_payload(summary)
+        st.write(summary)
 
         st.subheader("Parts by Category")
         rows = []
@@ -172,6 +239,7 @@ def _render_integrity_panel() -> None:
                 rows.append({"category": cat, "count": int(part_categories[cat])})
         for cat in sorted([c for c in part_categories.keys() if c not in CATEGORY_ORDER]):
             rows.append({"category": cat, "count": int(part_categories[cat])})
+        _dev_payload(rows)
         st.dataframe(rows, use_container_width=True, hide_index=True)
 
         st.subheader("Relationships by Type")
@@ -181,22 +249,92 @@ def _render_integrity_panel() -> None:
                 rel_rows.append({"type": t, "count": int(rel_types[t])})
         for t in sorted([x for x in rel_types.keys() if x not in REL_TYPE_ORDER]):
             rel_rows.append({"type": t, "count": int(rel_types[t])})
+        _dev_payload(rel_rows)
         st.dataframe(rel_rows, use_container_width=True, hide_index=True)
 
 
+def _prepare_export(m: MapModel) -> Optional[bytes]:
+    """
+    Canonical export bytes for the current map, or None while a background
+    export is running / when export is blocked by validation or has failed
+    (see export_blocked / export_failed).
+    """
+    cached = get_cached_export()
+    if cached is not None or export_blocked() or export_failed():
+        return cached
+
+    gen = get_map_generation()
+    if len(m.parts) + len(m.relationships) < BACKGROUND_EXPORT_MIN_ELEMENTS:
+        try:
+            result = jobs.export_with_round_trip(m, compress=COMPACT_SESSION)
+        except ValidationError as e:
+            set_issues(e.issues)
+            set_export_failure(gen, EXPORT_BLOCKED)
+            return None
+        except Exception:
+            set_export_failure(gen, EXPORT_FAILED)
+            return None
+        set_cached_export(gen, result.data, result.round_trip, result.gz)
+        return result.data
+
+    job = get_export_job()
+    if job is None or job.tag != gen:
+        if job is not None:
+            job.cancel()
+        set_export_job(jobs.start_export_job(m, tag=gen, compress=COMPACT_SESSION))
+    return None
+
+
 def _render_export_preview() -> None:
     m = get_map()
     with st.expander("Export JSON Preview (read-only)", expanded=False):
         if m is None:
             st.info("No map loaded.")
             return
-        try:
-            json_text = io_json.export_map_to_json_text(m, indent=2)
+        data = _prepare_export(m)
+        if data is not None:
+            json_text = data.decode("utf-8")
+            _dev_payload(json_text)
             st.text_area("Export JSON", value=json_text, height=320)
-        except ValidationError as e:
-            set_issues(e.issues)
+        elif export_blocked():
             st.error("Export blocked by validation (privacy-safe).")
-            st.write([{"code": iss.code, "path": iss.path} for iss in e.issues])
+            st.write([{"code": iss.code, "path": iss.path} for iss in get_issues()])
+        elif export_failed():
+            st.error("Export failed.")
+        else:
+            st.info("Preparing export…")
+
+
+def _render_compare_view() -> None:
+    m = get_map()
+    with st.expander("Compare with another export (session-only)", expanded=False):
+        if m is None:
+            st.info("No map loaded.")
+            return
+        st.caption("Lists what differs by id. Nothing is stored beyond this session.")
+        other = st.file_uploader(
+            "Other export (.json / .json.gz)",
+            type=["json", "gz"],
+            accept_multiple_files=False,
+            key="ifs_mapper_v1_compare_upload",
+        )
+        if other is None:
+            set_compare_result(None, None)
+            return
+        result = get_compare_result(other.file_id)
+        if result is None:
+            try:
+                other_map = io_json.import_map_from_bytes(other.getvalue())
+            except UnicodeDecodeError:
+                st.error("Compare failed: file is not valid UTF-8.")
+                return
+            except ValidationError as e:
+                st.error("Compare failed: other file did not validate (privacy-safe).")
+                st.write([{"code": iss.code, "path": iss.path} for iss in e.issues])
+                return
+            result = diff_maps(other_map, m).to_dict()
+            set_compare_result(other.file_id, result)
+        st.write({"direction": "other file -> current map", **result})
 
 
 def _render_map_view() -> None:
@@ -206,62 +344,165 @@ def _render_map_view() -> None:
         return
 
     st.subheader("Map")
-    st.write(
-        {
-            "schema_version": m.schema_version,
-            "map_id": m.map_id,
-            "title": m.title,
-            "parts_count": len(m.parts),
-            "relationships_count": len(m.relationships),
-        }
-    )
+    map_summary = {
+        "schema_version": m.schema_version,
+        "map_id": m.map_id,
+        "title": m.title,
+        "parts_count": len(m.parts),
+        "relationships_count": len(m.relationships),
+    }
+    _dev_payload(map_summary)
+    st.write(map_summary)
 
     st.subheader("Trailhead")
-    st.write(
-        {
-            "trigger": m.trailhead.trigger,
-            "dominant_protector_patterns": m.trailhead.dominant_protector_patterns,
-            "core_vulnerability_themes": m.trailhead.core_vulnerability_themes,
-        }
-    )
+    trailhead_view = {
+        "trigger": m.trailhead.trigger,
+        "dominant_protector_patterns": m.trailhead.dominant_protector_patterns,
+        "core_vulnerability_themes": m.trailhead.core_vulnerability_themes,
+    }
+    _dev_payload(trailhead_view)
+    st.write(trailhead_view)
 
     st.subheader("Parts (sorted)")
     parts_sorted = sorted(m.parts, key=lambda p: (_cat_rank(p.category), p.label.lower(), p.id.lower()))
-    st.dataframe(
-        [{"id": p.id, "label": p.label, "category": p.category} for p in parts_sorted],
-        use_container_width=True,
-        hide_index=True,
-    )
+    part_rows = [{"id": p.id, "label": p.label, "category": p.category} for p in parts_sorted]
+    _dev_payload(part_rows)
+    st.dataframe(part_rows, use_container_width=True, hide_index=True)
 
     st.subheader("Relationships (sorted)")
     rels_sorted = sorted(
         m.relationships,
         key=lambda r: (_rel_type_rank(r.type), r.source_part_id.lower(), r.target_part_id.lower(), r.id.lower()),
     )
-    st.dataframe(
-        [
+    rel_rows = [
+        {
+            "id": r.id,
+            "type": r.type,
+            "source_part_id": r.source_part_id,
+            "target_part_id": r.target_part_id,
+        }
+        for r in rels_sorted
+    ]
+    _dev_payload(rel_rows)
+    st.dataframe(rel_rows, use_container_width=True, hide_index=True)
+
+
+def _render_dev_profiler(last: dict) -> None:
+    with st.expander("Developer: rerun profiler (local only)", expanded=False):
+        st.caption("Timings and byte counts only; session-local, never stored or sent anywhere.")
+        st.write(
             {
-                "id": r.id,
-                "type": r.type,
-                "source_part_id": r.source_part_id,
-                "target_part_id": r.target_part_id,
+                "rerun_total_ms": round(last["total_ms"], 2),
+                "payload_bytes_approx": last["payload_bytes"],
             }
-            for r in rels_sorted
-        ],
-        use_container_width=True,
-        hide_index=True,
-    )
+        )
+        st.write({"session_memory": session_memory_report()})
+        st.dataframe(
+            [{"section": k, "ms": round(v, 2)} for k, v in sorted(last["sections_ms"].items(), key=lambda kv: -kv[1])],
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.subheader("Recent reruns")
+        st.dataframe(
+            [
+                {"rerun": i, "total_ms": round(h["total_ms"], 2), "payload_bytes_approx": h["payload_bytes"]}
+                for i, h in enumerate(get_dev_history())
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+def _apply_import_outcome(
+    result: Optional[MapModel], error: Optional[BaseException], messages: List[Tuple[str, str]]
+) -> None:
+    # Map and issues are always replaced together, on the script thread.
+    if error is None and result is not None:
+        try:
+            set_map(result)
+            set_issues([])
+            messages.append(("success", "Imported."))
+            return
+        except ValidationError as e:
+            error = e
+    set_map(None)
+    if isinstance(error, ValidationError):
+        set_issues(error.issues)
+    elif isinstance(error, UnicodeDecodeError):
+        set_issues([])
+        messages.append(("error", "Import failed: file is not valid UTF-8."))
+    else:
+        set_issues([])
+        messages.append(("error", "Import failed."))
+
+
+def _collect_finished_jobs() -> List[Tuple[str, str]]:
+    messages: List[Tuple[str, str]] = []
+
+    job = get_import_job()
+    if job is not None and job.finished:
+        set_import_job(None)
+        if job.status() == jobs.CANCELLED:
+            messages.append(("info", "Import cancelled."))
+        else:
+            _apply_import_outcome(job.result, job.error, messages)
+
+    ejob = get_export_job()
+    if ejob is not None and ejob.finished:
+        set_export_job(None)
+        if ejob.status() == jobs.DONE:
+            set_cached_export(ejob.tag, ejob.result.data, ejob.result.round_trip, ejob.result.gz)
+        elif ejob.status() == jobs.FAILED and ejob.tag == get_map_generation():
+            if isinstance(ejob.error, ValidationError):
+                set_issues(ejob.error.issues)
+                set_export_failure(ejob.tag, EXPORT_BLOCKED)
+            else:
+                set_export_failure(ejob.tag, EXPORT_FAILED)
+
+    return messages
+
+
+def _show_messages(messages: List[Tuple[str, str]]) -> None:
+    for kind, text in messages:
+        getattr(st, kind)(text)
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _render_job_progress() -> None:
+    # Polls only while a job exists; a finished job triggers one full rerun so
+    # _collect_finished_jobs can apply it.
+    active = [j for j in (get_import_job(), get_export_job()) if j is not None]
+    if any(j.finished for j in active):
+        st.rerun()
+    for j in active:
+        p = j.progress()
+        frac = min(1.0, p.done / p.total) if p.total else 0.0
+        st.progress(frac, text=f"{j.kind}: {p.stage} ({p.done}/{p.total})")
+        if j.kind == "import" and st.button("Cancel import", type="secondary"):
+            j.cancel()
+
+
+def _cancel_jobs() -> None:
+    # A stale job must not land on (or export) a map the user has replaced.
+    for get_job, set_job in ((get_import_job, set_import_job), (get_export_job, set_export_job)):
+        job = get_job()
+        if job is not None:
+            job.cancel()
+            set_job(None)
 
 
 def _load_model_into_session(m: MapModel) -> None:
-    canonical_json = io_json.export_map_to_json_text(m, indent=2)
-    m2 = io_json.import_map_from_json_text(canonical_json)
-    set_map(m2)
+    _cancel_jobs()
+    set_map(io_json.ensure_export_ready(m))
     set_issues([])
 
 
 def main() -> None:
     init_session_state()
+    rerun_t0 = time.perf_counter()
+    if DEV_PROFILE_ENABLED:
+        begin_dev_rerun()
+    job_messages = _collect_finished_jobs()
 
     st.title("IFS Parts Mapper (V1)")
     st.caption("Non-clinical • phenomenological • privacy-first • session-based • JSON import/export only")
@@ -300,61 +541,100 @@ def main() -> None:
 
         st.divider()
 
-        uploaded = st.file_uploader("Import JSON (.json)", type=["json"], accept_multiple_files=False)
-        if uploaded is not None:
-            try:
-                text = uploaded.getvalue().decode("utf-8", errors="strict")
-                m = io_json.import_map_from_json_text(text)
-                set_map(m)
-                set_issues([])
-                st.success("Imported.")
-            except UnicodeDecodeError:
-                set_map(None)
-                set_issues([])
-                st.error("Import failed: file is not valid UTF-8.")
-            except ValidationError as e:
-                set_map(None)
-                set_issues(e.issues)
+        uploaded = st.file_uploader(
+            "Import JSON (.json / .json.gz)", type=["json", "gz"], accept_multiple_files=False, key=uploader_key()
+        )
+        if uploaded is not None and uploaded.file_id != last_import_file_id():
+            set_last_import_file_id(uploaded.file_id)
+            with _dev_timed("upload_import"):
+                data = uploaded.getvalue()
+                previous = get_import_job()
+                if previous is not None:
+                    previous.cancel()
+                    set_import_job(None)
+                # Compressed size says little about the work; gzip always goes to the worker.
+                if len(data) >= BACKGROUND_IMPORT_MIN_BYTES or io_json.is_gzip_bytes(data):
+                    set_import_job(jobs.start_import_job(data))
+                else:
+                    try:
+                        _apply_import_outcome(io_json.import_map_from_bytes(data), None, job_messages)
+                    except (UnicodeDecodeError, ValidationError) as e:
+                        _apply_import_outcome(None, e, job_messages)
+                release_uploaded_file()
+
+        _show_messages(job_messages)
 
         st.divider()
 
-        m = get_map()
-        if m is None:
-            st.download_button(
-                "Export JSON (disabled - no map loaded)",
-                data="",
-                file_name="ifs_parts_map.json",
-                disabled=True,
-            )
-        else:
-            fname = f"ifs_parts_map_{_safe_filename_component(m.map_id)}.json"
-            try:
-                json_text = io_json.export_map_to_json_text(m, indent=2)
-                st.download_button(
-                    "Export JSON",
-                    data=json_text.encode("utf-8"),
-                    file_name=fname,
-                    mime="application/json",
-                )
-            except ValidationError as e:
-                set_issues(e.issues)
+        compress_export = st.checkbox("Compress export (.json.gz)", value=False)
+        with _dev_timed("sidebar_export"):
+            m = get_map()
+            if m is None:
                 st.download_button(
-                    "Export JSON (blocked by validation)",
+                    "Export JSON (disabled - no map loaded)",
                     data="",
-                    file_name=fname,
+                    file_name="ifs_parts_map.json",
                     disabled=True,
                 )
+            else:
+                fname = f"ifs_parts_map_{_safe_filename_component(m.map_id)}.json"
+                json_bytes = _prepare_export(m)
+                if json_bytes is not None and compress_export:
+                    gz_bytes = get_cached_export_gz()
+                    if gz_bytes is None:
+                        gz_bytes = io_json.compress_gzip_bytes(json_bytes)
+                        set_cached_export_gz(get_map_generation(), gz_bytes)
+                    _dev_payload(gz_bytes)
+                    st.download_button(
+                        "Export JSON (.json.gz)",
+                        data=gz_bytes,
+                        file_name=fname + ".gz",
+                        mime="application/gzip",
+                    )
+                elif json_bytes is not None:
+                    _dev_payload(json_bytes)
+                    st.download_button(
+                        "Export JSON",
+                        data=json_bytes,
+                        file_name=fname,
+                        mime="application/json",
+                    )
+                else:
+                    if export_blocked():
+                        label = "Export JSON (blocked by validation)"
+                    elif export_failed():
+                        label = "Export JSON (export failed)"
+                    else:
+                        label = "Export JSON (preparing…)"
+                    st.download_button(label, data="", file_name=fname, disabled=True)
 
         st.divider()
 
         if st.button("Clear session map", type="secondary"):
+            _cancel_jobs()
             set_map(None)
             set_issues([])
 
-    _render_issues()
-    _render_integrity_panel()
-    _render_export_preview()
-    _render_map_view()
+        # Decided last: the upload and export steps above may have started a
+        # job on this run, and an unpolled job is never collected.
+        if get_import_job() is not None or get_export_job() is not None:
+            _render_job_progress()
+
+    with _dev_timed("_render_issues"):
+        _render_issues()
+    with _dev_timed("_render_integrity_panel"):
+        _render_integrity_panel()
+    with _dev_timed("_render_export_preview"):
+        _render_export_preview()
+    with _dev_timed("_render_compare_view"):
+        _render_compare_view()
+    with _dev_timed("_render_map_view"):
+        _render_map_view()
+
+    if DEV_PROFILE_ENABLED:
+        _render_dev_profiler(end_dev_rerun(time.perf_counter() - rerun_t0))
+
+    release_map_views()
 
 
 if __name__ == "__main__":
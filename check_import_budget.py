@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+
+# =========================
+# Import-time Budget Check (headless core)
+# =========================
+#
+# Imports every ifs_mapper module in a fresh interpreter and fails if
+#   - any module outside the stdlib (and ifs_mapper itself) gets loaded, or
+#   - the best-of-N import time exceeds the budget.
+# Only modules added by the import are considered, so site/startup hooks of
+# the local environment do not count against the core.
+
+CORE_MODULES = [
+    "ifs_mapper",
+    "ifs_mapper.models",
+    "ifs_mapper.validate",
+    "ifs_mapper.io_json",
+    "ifs_mapper.profiling",
+    "ifs_mapper.progress",
+    "ifs_mapper.edit",
+    "ifs_mapper.diff",
+    "ifs_mapper.jobs",
+    "ifs_mapper.map_generator",
+    "ifs_mapper.service",
+    "ifs_mapper.spatial",
+]
+
+_PROBE = """
+import json, sys, time
+before = set(sys.modules)
+t0 = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - t0
+added = sorted(set(sys.modules) - before)
+roots = {{m.split(".")[0] for m in added}}
+# "__mp_main__" etc. are interpreter aliases (multiprocessing), not packages.
+foreign = sorted(
+    r for r in roots
+    if r != "ifs_mapper" and r not in sys.stdlib_module_names and not r.startswith("__")
+)
+print(json.dumps({{"seconds": elapsed, "modules_added": len(added), "foreign": foreign}}))
+"""
+
+
+def probe_once(root: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = root + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(modules=CORE_MODULES)],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Check that the headless core imports fast and stdlib-only.")
+    ap.add_argument("--budget-ms", type=float, default=150.0)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    runs = [probe_once(root) for _ in range(max(1, args.runs))]
+    best_ms = min(r["seconds"] for r in runs) * 1000.0
+    foreign = sorted({m for r in runs for m in r["foreign"]})
+
+    report = {
+        "best_ms": round(best_ms, 2),
+        "budget_ms": args.budget_ms,
+        "modules_added": runs[0]["modules_added"],
+        "foreign_modules": foreign,
+    }
+    print(json.dumps(report, indent=2, sort_keys=True))
+    return 0 if not foreign and best_ms <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
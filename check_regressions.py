@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+from ifs_mapper import io_json, service
+from ifs_mapper.edit import MapEditor
+from ifs_mapper.map_generator import generate_map_dict, generate_map_json_text
+from ifs_mapper.models import Part, Relationship
+from ifs_mapper.validate import ValidationError
+
+
+# =========================
+# Regression Repro Checks (headless core)
+# =========================
+#
+# One function per reviewed bug; each returns a failure code or "" when the
+# fixed behaviour holds. Exits non-zero if any check fails. Generated maps
+# contain placeholder text only, and the report carries check names and codes.
+
+def check_in_place_edit_loses_provenance() -> str:
+    # Same-length in-place replacement after import must not export unchecked.
+    model = io_json.import_map_from_json_text(generate_map_json_text(4, 3))
+    model.parts[0] = Part(id="", label="", category="Self")  # type: ignore[arg-type]
+    r = model.relationships[0]
+    model.relationships[0] = Relationship(
+        id=r.id, source_part_id=r.source_part_id, target_part_id="ghost", type="nonsense"  # type: ignore[arg-type]
+    )
+    try:
+        io_json.export_map_to_json_text(model)
+    except ValidationError:
+        return ""
+    return "EXPORTED_INVALID_MODEL"
+
+
+def check_editor_rejects_non_string_fields() -> str:
+    # Hand-built edits with non-string / unhashable values must raise
+    # ValidationError, never TypeError.
+    editor = MapEditor(io_json.import_map_from_json_text(generate_map_json_text(4, 3)))
+    pid = "p000000"  # map_generator id
+    edits: List[Callable[[], None]] = [
+        lambda: editor.add_relationship(Relationship(id="rx", source_part_id=None, target_part_id=pid, type="polarized_with")),  # type: ignore[arg-type]
+        lambda: editor.add_relationship(Relationship(id="ry", source_part_id=pid, target_part_id=[], type=[])),  # type: ignore[arg-type]
+        lambda: editor.add_part(Part(id=[], label="x", category=[])),  # type: ignore[arg-type]
+        lambda: editor.update_part(Part(id={}, label="x", category="Other")),  # type: ignore[arg-type]
+        lambda: editor.remove_part([]),  # type: ignore[arg-type]
+        lambda: editor.remove_relationship([]),  # type: ignore[arg-type]
+    ]
+    for edit in edits:
+        try:
+            edit()
+        except ValidationError:
+            continue
+        return "EDIT_ACCEPTED"
+    return ""
+
+
+def check_bundle_bad_utf8_line_is_per_line() -> str:
+    # An undecodable line must become a lines[i] issue; the lines around it
+    # still import (plain and .gz bundles).
+    line = generate_map_json_text(3, 2).replace("\n", "").encode("utf-8")
+    payload = line + b"\n\xff\xfe{}\n" + line + b"\n"
+    with tempfile.TemporaryDirectory() as d:
+        for name, data in (("b.ndjson", payload), ("b.ndjson.gz", io_json.compress_gzip_bytes(payload))):
+            path = os.path.join(d, name)
+            with open(path, "wb") as f:
+                f.write(data)
+            items = list(io_json.import_map_bundle_from_file(path))
+            shape = [(it.line_index, it.model is not None, [(i.code, i.path) for i in it.issues]) for it in items]
+            if shape != [(0, True, []), (1, False, [("NOT_UTF8", "lines[1]")]), (2, True, [])]:
+                return "BUNDLE_NOT_PER_LINE"
+    return ""
+
+
+def check_bundle_size_limit_is_per_line() -> str:
+    # With a limit smaller than the gzip read-ahead but larger than each line,
+    # every line imports; an over-limit line is a lines[i] issue and the next
+    # line still imports. A truncated .gz ends with an item, never a raise.
+    line = generate_map_json_text(3, 2).replace("\n", "").encode("utf-8")
+    payload = line + b"\n" + b"[" + b" " * (4 * len(line)) + b"]\n" + line + b"\n"
+    gz = io_json.compress_gzip_bytes(payload)
+    want = [(0, True, []), (1, False, [("DECOMPRESSED_SIZE_LIMIT", "lines[1]")]), (2, True, [])]
+    with tempfile.TemporaryDirectory() as d:
+        for name, data, expected in (
+            ("b.ndjson", payload, want),
+            ("b.ndjson.gz", gz, want),
+            ("t.ndjson.gz", gz[: len(gz) - 12], None),
+        ):
+            path = os.path.join(d, name)
+            with open(path, "wb") as f:
+                f.write(data)
+            items = list(io_json.import_map_bundle_from_file(path, max_decompressed_bytes=2 * len(line)))
+            shape = [(it.line_index, it.model is not None, [(i.code, i.path) for i in it.issues]) for it in items]
+            if expected is None:
+                if not shape or shape[-1][2][:1] != [("GZIP_INVALID", f"lines[{shape[-1][0]}]")]:
+                    return "TRUNCATED_GZ_NOT_REPORTED"
+            elif shape != expected:
+                return "BUNDLE_LIMIT_NOT_PER_LINE"
+    return ""
+
+
+def check_service_canonicalizes_polarized_order() -> str:
+    # b->a polarized_with must come back as a->b, not 422.
+    d = generate_map_dict(n_parts=2, n_relationships=0)
+    a, b = sorted(p["id"] for p in d["parts"])
+    d["relationships"] = [{"id": "r1", "source_part_id": b, "target_part_id": a, "type": "polarized_with"}]
+    status, body = service.work_canonicalize(json.dumps(d).encode("utf-8"))
+    if status != 200:
+        return "NOT_CANONICALIZED"
+    rel = json.loads(body)["relationships"][0]
+    return "" if (rel["source_part_id"], rel["target_part_id"]) == (a, b) else "WRONG_ORDER"
+
+
+def check_service_caps_decompressed_size() -> str:
+    # A small gzip body that expands past the limit must stop in the worker
+    # with 413 DECOMPRESSED_SIZE_LIMIT on both endpoints.
+    limit = 1 << 20
+    body = io_json.compress_gzip_bytes(b" " * (4 * limit))
+    for work in (service.work_validate, service.work_canonicalize):
+        status, out = work(body, limit)
+        codes = [i["code"] for i in json.loads(out).get("issues", [])]
+        if status != 413 or codes != ["DECOMPRESSED_SIZE_LIMIT"]:
+            return "DECOMPRESSION_NOT_CAPPED"
+    return ""
+
+
+def check_service_rejects_body_on_get() -> str:
+    # A GET with a body must be refused, not leave the body to be parsed as
+    # the next keep-alive request.
+    async def read(raw: bytes) -> str:
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        try:
+            await service._read_request(reader, service.MAX_BODY_BYTES)
+        except service._HttpError as e:
+            return e.code
+        return "OK"
+
+    if asyncio.run(read(b"GET /health HTTP/1.1\r\nContent-Length: 5\r\n\r\nhelloGET /health HTTP/1.1\r\n\r\n")) != "BAD_REQUEST":
+        return "BODY_ON_GET_ACCEPTED"
+    if asyncio.run(read(b"GET /health HTTP/1.1\r\nContent-Length: 0\r\n\r\n")) != "OK":
+        return "EMPTY_GET_REJECTED"
+    return ""
+
+
+CHECKS: Dict[str, Callable[[], str]] = {
+    "in_place_edit_loses_provenance": check_in_place_edit_loses_provenance,
+    "editor_rejects_non_string_fields": check_editor_rejects_non_string_fields,
+    "bundle_bad_utf8_line_is_per_line": check_bundle_bad_utf8_line_is_per_line,
+    "bundle_size_limit_is_per_line": check_bundle_size_limit_is_per_line,
+    "service_canonicalizes_polarized_order": check_service_canonicalizes_polarized_order,
+    "service_caps_decompressed_size": check_service_caps_decompressed_size,
+    "service_rejects_body_on_get": check_service_rejects_body_on_get,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run repro checks for reviewed regressions.")
+    ap.add_argument("--check", action="append", choices=sorted(CHECKS), help="run only these checks")
+    args = ap.parse_args(argv)
+
+    results: Dict[str, str] = {}
+    for name in args.check or list(CHECKS):
+        try:
+            results[name] = CHECKS[name]() or "OK"
+        except Exception as e:  # report type only (no content)
+            results[name] = f"RAISED_{type(e).__name__}"
+    print(json.dumps(results, indent=2, sort_keys=True))
+    return 0 if all(v == "OK" for v in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+IFS Parts Mapper V1 — headless core (model, validation, JSON import/export).
+
+Stdlib only: importing this package must never pull in Streamlit or any
+third-party module (see check_import_budget.py). The Streamlit UI (app.py,
+session_state.py) is an optional layer installed via the "app" extra.
+"""
+from __future__ import annotations
+
+from .io_json import (
+    export_map_to_dict,
+    export_map_to_file,
+    export_map_to_json_text,
+    import_map_from_bytes,
+    import_map_from_file,
+    import_map_from_json_text,
+)
+from .models import MapModel, Part, PartCategory, Relationship, RelationshipType, Trailhead
+from .validate import (
+    EXPORT_SCHEMA_VERSION,
+    ValidationError,
+    ValidationIssue,
+    validate_map_dict_strict,
+    validate_map_model_for_export,
+)
+
+__all__ = [
+    "EXPORT_SCHEMA_VERSION",
+    "MapModel",
+    "Part",
+    "PartCategory",
+    "Relationship",
+    "RelationshipType",
+    "Trailhead",
+    "ValidationError",
+    "ValidationIssue",
+    "export_map_to_dict",
+    "export_map_to_file",
+    "export_map_to_json_text",
+    "import_map_from_bytes",
+    "import_map_from_file",
+    "import_map_from_json_text",
+    "validate_map_dict_strict",
+    "validate_map_model_for_export",
+]
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from . import io_json
+from .models import MapModel
+from .validate import ValidationError
+
+
+# =========================
+# Structural Diff (by id, no interpretation)
+# =========================
+#
+# O(n + m): both maps are indexed by id once, then compared by dict lookup.
+# Results contain ids and field names only — never labels or trailhead text.
+# Ordering of the output lists is sorted for determinism.
+
+
+@dataclass(slots=True)
+class MapDiff:
+    map_id_matches: bool
+    title_changed: bool = False
+    parts_added: List[str] = field(default_factory=list)
+    parts_removed: List[str] = field(default_factory=list)
+    parts_relabeled: List[str] = field(default_factory=list)
+    parts_recategorized: List[str] = field(default_factory=list)
+    relationships_added: List[str] = field(default_factory=list)
+    relationships_removed: List[str] = field(default_factory=list)
+    relationships_changed: List[str] = field(default_factory=list)
+    trailhead_fields_changed: List[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.title_changed
+            or self.parts_added or self.parts_removed
+            or self.parts_relabeled or self.parts_recategorized
+            or self.relationships_added or self.relationships_removed or self.relationships_changed
+            or self.trailhead_fields_changed
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def diff_maps(old: MapModel, new: MapModel) -> MapDiff:
+    """
+    Compare two maps by id:
+      - parts: added / removed / label changed / category changed
+      - relationships: added / removed / changed (same id, different
+        endpoints or type)
+      - trailhead: names of fields whose value differs
+    """
+    d = MapDiff(map_id_matches=old.map_id == new.map_id, title_changed=old.title != new.title)
+
+    old_parts = {p.id: p for p in old.parts}
+    new_parts = {p.id: p for p in new.parts}
+    for pid, np_ in new_parts.items():
+        op = old_parts.get(pid)
+        if op is None:
+            d.parts_added.append(pid)
+            continue
+        if op.label != np_.label:
+            d.parts_relabeled.append(pid)
+        if op.category != np_.category:
+            d.parts_recategorized.append(pid)
+    d.parts_removed = [pid for pid in old_parts if pid not in new_parts]
+
+    old_rels = {r.id: r for r in old.relationships}
+    new_rels = {r.id: r for r in new.relationships}
+    for rid, nr in new_rels.items():
+        orr = old_rels.get(rid)
+        if orr is None:
+            d.relationships_added.append(rid)
+        elif (orr.source_part_id, orr.target_part_id, orr.type) != (nr.source_part_id, nr.target_part_id, nr.type):
+            d.relationships_changed.append(rid)
+    d.relationships_removed = [rid for rid in old_rels if rid not in new_rels]
+
+    for key in ("trigger", "dominant_protector_patterns", "core_vulnerability_themes"):
+        if getattr(old.trailhead, key) != getattr(new.trailhead, key):
+            d.trailhead_fields_changed.append(key)
+
+    for lst in (
+        d.parts_added, d.parts_removed, d.parts_relabeled, d.parts_recategorized,
+        d.relationships_added, d.relationships_removed, d.relationships_changed,
+    ):
+        lst.sort()
+    return d
+
+
+# =========================
+# CLI (batch use)
+# =========================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    python -m ifs_mapper.diff OLD.json NEW.json
+    Prints the diff as JSON. Exit code: 0 no changes, 1 changes, 2 invalid input
+    (privacy-safe issue codes on stderr).
+    """
+    ap = argparse.ArgumentParser(description="Structural diff of two V1 map exports (ids only).")
+    ap.add_argument("old")
+    ap.add_argument("new")
+    args = ap.parse_args(argv)
+
+    models: List[MapModel] = []
+    for label, path in (("old", args.old), ("new", args.new)):
+        try:
+            models.append(io_json.import_map_from_file(path))
+        except ValidationError as e:
+            print(json.dumps({"input": label, "issues": [{"code": i.code, "path": i.path} for i in e.issues]}), file=sys.stderr)
+            return 2
+        except (OSError, UnicodeDecodeError):
+            print(json.dumps({"input": label, "issues": [{"code": "UNREADABLE_FILE", "path": "$"}]}), file=sys.stderr)
+            return 2
+
+    d = diff_maps(models[0], models[1])
+    print(json.dumps(d.to_dict(), indent=2, sort_keys=True))
+    return 0 if d.is_empty else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from typing import Dict, List, Set, Tuple
+
+from .models import MapModel, Part, Relationship, Trailhead
+from .validate import (
+    ALLOWED_PART_CATEGORIES,
+    ALLOWED_RELATIONSHIP_TYPES,
+    ValidationError,
+    ValidationIssue,
+    _is_nonempty_str,
+    _is_str,
+    _mark_validated,
+    canonicalize_polarized_endpoints,
+    is_validated_model,
+    validate_map_model_for_export,
+)
+
+
+# =========================
+# Incremental Editing (delta validation)
+# =========================
+#
+# MapEditor keeps the id, reference and polarized-pair indexes of one map and
+# validates only what an edit touches:
+#   - part edits: O(1); remove_part is O(degree) (its relationships go too)
+#   - relationship edits: O(1)
+# Every edit either applies completely or raises ValidationError (privacy-safe
+# issues, same codes as validate.py) and leaves the editor unchanged.
+#
+# Paths are structural only ("$.parts.id"); edits are addressed by id, so no
+# list index exists to report.
+
+_PARTS = "$.parts"
+_RELS = "$.relationships"
+
+
+class MapEditor:
+    def __init__(self, model: MapModel):
+        """
+        Start from a model with validated provenance; anything else gets the
+        full export check first (raises ValidationError).
+        """
+        if not is_validated_model(model):
+            validate_map_model_for_export(model)
+        self.schema_version = model.schema_version
+        self.map_id = model.map_id
+        self.title = model.title
+        self.trailhead = model.trailhead
+        self._parts: Dict[str, Part] = {p.id: p for p in model.parts}
+        self._rels: Dict[str, Relationship] = {}
+        self._rels_by_part: Dict[str, Set[str]] = {pid: set() for pid in self._parts}
+        self._polarized: Dict[Tuple[str, str], str] = {}
+        for r in model.relationships:
+            self._index_rel(r)
+
+    # ---------- indexes ----------
+
+    def _index_rel(self, r: Relationship) -> None:
+        self._rels[r.id] = r
+        self._rels_by_part[r.source_part_id].add(r.id)
+        self._rels_by_part[r.target_part_id].add(r.id)
+        if r.type == "polarized_with":
+            self._polarized[(r.source_part_id, r.target_part_id)] = r.id
+
+    def _unindex_rel(self, r: Relationship) -> None:
+        del self._rels[r.id]
+        self._rels_by_part[r.source_part_id].discard(r.id)
+        self._rels_by_part[r.target_part_id].discard(r.id)
+        if r.type == "polarized_with":
+            self._polarized.pop((r.source_part_id, r.target_part_id), None)
+
+    # ---------- queries ----------
+
+    def has_part(self, part_id: str) -> bool:
+        return part_id in self._parts
+
+    def get_part(self, part_id: str) -> Part:
+        return self._parts[part_id]
+
+    def relationship_ids_for(self, part_id: str) -> List[str]:
+        return sorted(self._rels_by_part.get(part_id, ()))
+
+    @property
+    def part_count(self) -> int:
+        return len(self._parts)
+
+    @property
+    def relationship_count(self) -> int:
+        return len(self._rels)
+
+    # ---------- delta validation ----------
+
+    @staticmethod
+    def _part_issues(p: Part) -> List[ValidationIssue]:
+        issues: List[ValidationIssue] = []
+        if not _is_nonempty_str(p.id):
+            issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=f"{_PARTS}.id"))
+        if not _is_nonempty_str(p.label):
+            issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=f"{_PARTS}.label"))
+        if not _is_str(p.category):
+            issues.append(ValidationIssue(code="TYPE_NOT_STRING", path=f"{_PARTS}.category"))
+        elif p.category not in ALLOWED_PART_CATEGORIES:
+            issues.append(ValidationIssue(code="INVALID_ENUM", path=f"{_PARTS}.category"))
+        return issues
+
+    def _rel_issues(self, r: Relationship) -> List[ValidationIssue]:
+        issues: List[ValidationIssue] = []
+        if not _is_nonempty_str(r.id):
+            issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=f"{_RELS}.id"))
+        elif r.id in self._rels:
+            issues.append(ValidationIssue(code="DUPLICATE_ID", path=f"{_RELS}.id"))
+        endpoints_ok = True
+        for field_name in ("source_part_id", "target_part_id"):
+            v = getattr(r, field_name)
+            if not _is_nonempty_str(v):
+                issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=f"{_RELS}.{field_name}"))
+                endpoints_ok = False
+            elif v not in self._parts:
+                issues.append(ValidationIssue(code="BAD_REFERENCE", path=f"{_RELS}.{field_name}"))
+        if not _is_str(r.type):
+            issues.append(ValidationIssue(code="TYPE_NOT_STRING", path=f"{_RELS}.type"))
+        elif r.type not in ALLOWED_RELATIONSHIP_TYPES:
+            issues.append(ValidationIssue(code="INVALID_ENUM", path=f"{_RELS}.type"))
+        # Ordering and self-loop rules only apply to string endpoints.
+        if not endpoints_ok:
+            return issues
+        if r.source_part_id == r.target_part_id:
+            issues.append(ValidationIssue(code="SELF_LOOP_FORBIDDEN", path=_RELS))
+        if r.type == "polarized_with":
+            a, b = canonicalize_polarized_endpoints(r.source_part_id, r.target_part_id)
+            if (a, b) in self._polarized:
+                issues.append(ValidationIssue(code="DUPLICATE_POLARIZED_PAIR", path=_RELS))
+            elif (r.source_part_id, r.target_part_id) != (a, b):
+                issues.append(ValidationIssue(code="POLARIZED_NOT_CANONICAL_ORDER", path=_RELS))
+        return issues
+
+    # ---------- part edits ----------
+
+    def add_part(self, part: Part) -> None:
+        issues = self._part_issues(part)
+        if _is_nonempty_str(part.id) and part.id in self._parts:
+            issues.append(ValidationIssue(code="DUPLICATE_ID", path=f"{_PARTS}.id"))
+        if issues:
+            raise ValidationError(issues)
+        self._parts[part.id] = part
+        self._rels_by_part[part.id] = set()
+
+    def update_part(self, part: Part) -> None:
+        """
+        Replace label/category of an existing part (matched by id; ids are
+        immutable here because relationships reference them).
+        """
+        if not _is_nonempty_str(part.id) or part.id not in self._parts:
+            raise ValidationError([ValidationIssue(code="BAD_REFERENCE", path=f"{_PARTS}.id")])
+        issues = self._part_issues(part)
+        if issues:
+            raise ValidationError(issues)
+        self._parts[part.id] = part
+
+    def remove_part(self, part_id: str) -> List[str]:
+        """
+        V1 rule: deleting a Part deletes its Relationships.
+        Returns the removed relationship ids (sorted).
+        """
+        if not _is_nonempty_str(part_id) or part_id not in self._parts:
+            raise ValidationError([ValidationIssue(code="BAD_REFERENCE", path=f"{_PARTS}.id")])
+        removed = sorted(self._rels_by_part[part_id])
+        for rid in removed:
+            self._unindex_rel(self._rels[rid])
+        del self._rels_by_part[part_id]
+        del self._parts[part_id]
+        return removed
+
+    # ---------- relationship edits ----------
+
+    def add_relationship(self, rel: Relationship) -> None:
+        issues = self._rel_issues(rel)
+        if issues:
+            raise ValidationError(issues)
+        self._index_rel(rel)
+
+    def remove_relationship(self, rel_id: str) -> None:
+        r = self._rels.get(rel_id) if _is_nonempty_str(rel_id) else None
+        if r is None:
+            raise ValidationError([ValidationIssue(code="BAD_REFERENCE", path=f"{_RELS}.id")])
+        self._unindex_rel(r)
+
+    # ---------- map-level edits ----------
+
+    def set_title(self, title: str) -> None:
+        if not _is_nonempty_str(title):
+            raise ValidationError([ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path="$.title")])
+        self.title = title
+
+    def set_trailhead(self, trailhead: Trailhead) -> None:
+        """
+        O(len of trailhead lists); same rules as export validation.
+        """
+        issues: List[ValidationIssue] = []
+        if not _is_nonempty_str(trailhead.trigger):
+            issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path="$.trailhead.trigger"))
+        for key in ("dominant_protector_patterns", "core_vulnerability_themes"):
+            for j, item in enumerate(getattr(trailhead, key)):
+                if not _is_nonempty_str(item):
+                    issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=f"$.trailhead.{key}[{j}]"))
+        if issues:
+            raise ValidationError(issues)
+        self.trailhead = Trailhead(
+            trigger=trailhead.trigger,
+            dominant_protector_patterns=list(trailhead.dominant_protector_patterns),
+            core_vulnerability_themes=list(trailhead.core_vulnerability_themes),
+        )
+
+    # ---------- snapshot ----------
+
+    def to_model(self) -> MapModel:
+        """
+        O(map) snapshot. Every edit preserved the invariants, so the result
+        carries validated provenance and export skips the full re-check.
+        Insertion order of parts/relationships is preserved; updated parts
+        keep their position.
+        """
+        model = MapModel(
+            schema_version=self.schema_version,
+            map_id=self.map_id,
+            title=self.title,
+            parts=list(self._parts.values()),
+            relationships=list(self._rels.values()),
+            trailhead=Trailhead(
+                trigger=self.trailhead.trigger,
+                dominant_protector_patterns=list(self.trailhead.dominant_protector_patterns),
+                core_vulnerability_themes=list(self.trailhead.core_vulnerability_themes),
+            ),
+        )
+        _mark_validated(model)
+        return model
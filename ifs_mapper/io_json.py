@@ -0,0 +1,538 @@
+from __future__ import annotations
+
+import codecs
+import gzip
+import io
+import json
+import zlib
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+from .models import MapModel, Part, Relationship, Trailhead
+from .profiling import phase_end, phase_start
+from .progress import report_progress
+from .validate import (
+    EXPORT_SCHEMA_VERSION,
+    ValidationError,
+    ValidationIssue,
+    _mark_validated,
+    canonicalize_polarized_endpoints,
+    is_export_ready,
+    is_validated_model,
+    validate_map_dict_strict,
+    validate_map_model_for_export,
+)
+
+
+# =========================
+# Import / Export (Strict, Venv-safe, No extra deps)
+# =========================
+
+def import_map_from_json_text(json_text: str) -> MapModel:
+    """
+    Strict import:
+      - JSON must parse to an object
+      - schema_version must be 1.x.x
+      - unknown fields forbidden everywhere
+      - polarized_with must be stored once and already canonical-ordered (reject otherwise)
+      - no self-loops; referential integrity enforced
+      - errors contain NO user content
+    """
+    ph = phase_start("json_parse")
+    try:
+        data = json.loads(json_text)
+    except (json.JSONDecodeError, RecursionError):
+        # RecursionError: nesting deeper than the interpreter stack allows.
+        raise ValidationError([])  # privacy-safe: no content, no parse details
+    phase_end(ph, count=len(json_text))
+
+    return validate_map_dict_strict(data)
+
+
+_DECODE_CHUNK_BYTES = 1 << 20
+
+
+def import_map_from_json_bytes(data: bytes, encoding: str = "utf-8") -> MapModel:
+    """
+    Same as import_map_from_json_text, for raw upload bytes.
+    Decodes in chunks so progress ("decode", bytes done, bytes total) and
+    cancellation are observable on large inputs. Raises UnicodeDecodeError
+    on invalid encoding (callers report it without content).
+    """
+    total = len(data)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    chunks = []
+    view = memoryview(data)
+    for start in range(0, total, _DECODE_CHUNK_BYTES):
+        report_progress("decode", start, total)
+        chunks.append(decoder.decode(view[start:start + _DECODE_CHUNK_BYTES]))
+    chunks.append(decoder.decode(b"", final=True))
+    report_progress("parse", total, total)
+    return import_map_from_json_text("".join(chunks))
+
+
+def import_map_from_bytes(data: bytes, *, max_decompressed_bytes: Optional[int] = None) -> MapModel:
+    """
+    Upload entry point: gzip input (detected by magic bytes, not file name)
+    is decompressed under the size guard first, then imported as UTF-8 JSON.
+    """
+    if is_gzip_bytes(data):
+        data = decompress_gzip_bytes(data, max_decompressed_bytes=max_decompressed_bytes)
+    return import_map_from_json_bytes(data)
+
+
+def import_map_from_file(path: str, encoding: str = "utf-8", *, max_decompressed_bytes: Optional[int] = None) -> MapModel:
+    """
+    Paths ending in ".gz" are read through streaming gzip decompression with
+    the decompressed-size guard.
+    """
+    with _open_text_for_read(path, encoding, max_decompressed_bytes) as f:
+        return import_map_from_json_text(f.read())
+
+
+def export_map_to_dict(model: MapModel) -> Dict[str, Any]:
+    """
+    Strict export:
+      - schema_version must be exactly "1.0.0"
+      - model must satisfy all relational constraints
+      - produces dict with ONLY canonical fields (no extras)
+      - models with validated provenance skip the full re-check
+    """
+    if not is_export_ready(model):
+        validate_map_model_for_export(model)
+
+    report_progress("export_build", 0, len(model.parts) + len(model.relationships))
+    ph = phase_start("export_build_dict")
+    data = {
+        "schema_version": EXPORT_SCHEMA_VERSION,
+        "map_id": model.map_id,
+        "title": model.title,
+        "parts": [
+            {"id": p.id, "label": p.label, "category": p.category}
+            for p in model.parts
+        ],
+        "relationships": [
+            {
+                "id": r.id,
+                "source_part_id": r.source_part_id,
+                "target_part_id": r.target_part_id,
+                "type": r.type,
+            }
+            for r in model.relationships
+        ],
+        "trailhead": {
+            "trigger": model.trailhead.trigger,
+            "dominant_protector_patterns": list(model.trailhead.dominant_protector_patterns),
+            "core_vulnerability_themes": list(model.trailhead.core_vulnerability_themes),
+        },
+    }
+    phase_end(ph, count=len(model.parts) + len(model.relationships))
+    return data
+
+
+def export_map_to_json_text(model: MapModel, *, indent: Optional[int] = 2) -> str:
+    """
+    Deterministic JSON output (stable keys).
+    """
+    data = export_map_to_dict(model)
+    report_progress("export_serialize", 0, 1)
+    ph = phase_start("export_serialize")
+    text = json.dumps(data, ensure_ascii=False, indent=indent, sort_keys=True)
+    phase_end(ph, count=len(text))
+    return text
+
+
+def export_map_to_file(model: MapModel, path: str, *, indent: int = 2, encoding: str = "utf-8") -> None:
+    """
+    Paths ending in ".gz" are written gzip-compressed; the decompressed text
+    is byte-identical to the plain export.
+    """
+    text = export_map_to_json_text(model, indent=indent)
+    with _open_text_for_write(path, encoding) as f:
+        f.write(text)
+
+
+def ensure_export_ready(model: MapModel) -> MapModel:
+    """
+    Return the same model once it is known to satisfy export validation.
+    Validated models pass through; hand-built models get the full check
+    (raises ValidationError) and are then recorded as validated.
+    """
+    if not is_export_ready(model):
+        validate_map_model_for_export(model)
+    return model
+
+
+# =========================
+# NDJSON Bundles (one canonical V1 map per line)
+# =========================
+#
+# Line encoding is export_map_to_json_text(model, indent=None): same key
+# order, same escaping, single line (JSON escapes newlines inside strings).
+# Reading is streaming: one line, one map in memory at a time.
+# Issue paths are re-rooted at the line: "$.parts[0].id" on line 3 becomes
+# "lines[3].parts[0].id". Line indexes are 0-based; blank lines are skipped
+# but still counted.
+
+
+@dataclass(slots=True)
+class BundleItem:
+    """
+    One bundle line: model on success, otherwise privacy-safe issues.
+    """
+    line_index: int
+    model: Optional[MapModel] = None
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+
+def _line_path(line_index: int, path: str) -> str:
+    root = f"lines[{line_index}]"
+    if path == "$":
+        return root
+    return root + path[1:] if path.startswith("$") else f"{root}.{path}"
+
+
+def iter_map_bundle(lines: Iterable[str]) -> Iterator[BundleItem]:
+    """
+    Validate each non-blank line with the strict single-map rules.
+    Never raises for bad lines; yields a BundleItem with issues instead.
+    """
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        yield _bundle_item(i, line)
+
+
+def _bundle_item(i: int, line: str) -> BundleItem:
+    try:
+        model = import_map_from_json_text(line)
+    except ValidationError as e:
+        issues = [ValidationIssue(code=iss.code, path=_line_path(i, iss.path)) for iss in e.issues]
+        if not issues:
+            issues = [ValidationIssue(code="JSON_PARSE_ERROR", path=_line_path(i, "$"))]
+        return BundleItem(line_index=i, issues=issues)
+    return BundleItem(line_index=i, model=model)
+
+
+def _read_capped_lines(f: IO[bytes], cap: int) -> Iterator[Optional[bytes]]:
+    # None stands for a line longer than cap; its remainder is skipped in
+    # chunks, so memory stays bounded by cap whatever the line length.
+    while True:
+        raw = f.readline(cap + 1)
+        if not raw:
+            return
+        if len(raw) <= cap or raw.endswith(b"\n"):
+            yield raw
+            continue
+        while True:
+            rest = f.readline(_GZIP_CHUNK_BYTES)
+            if not rest or rest.endswith(b"\n"):
+                break
+        yield None
+
+
+def import_map_bundle_from_file(
+    path: str, encoding: str = "utf-8", *, max_decompressed_bytes: Optional[int] = None
+) -> Iterator[BundleItem]:
+    """
+    Lines are split on b"\\n" and decoded one at a time (ASCII-compatible
+    encodings), so an undecodable line yields a NOT_UTF8 issue at lines[i]
+    instead of aborting the rest of the bundle.
+
+    For bundles max_decompressed_bytes caps each line (plain or .gz), not
+    the whole stream: a longer line yields DECOMPRESSED_SIZE_LIMIT at
+    lines[i] and reading resumes at the next line. A corrupt .gz stream
+    ends the bundle with a GZIP_INVALID item at the first line not yet
+    yielded (lines still in the read-ahead buffer are not recovered).
+    """
+    cap = MAX_DECOMPRESSED_BYTES if max_decompressed_bytes is None else max_decompressed_bytes
+    with _open_bytes_for_read(path, None, total_limit=False) as f:
+        lines = _read_capped_lines(f, cap)
+        i = 0
+        while True:
+            try:
+                raw = next(lines, b"")
+            except ValidationError as e:  # corrupt .gz: the stream cannot resume
+                yield BundleItem(line_index=i, issues=[ValidationIssue(code=iss.code, path=_line_path(i, iss.path)) for iss in e.issues])
+                return
+            if raw is None:
+                yield BundleItem(line_index=i, issues=[ValidationIssue(code="DECOMPRESSED_SIZE_LIMIT", path=_line_path(i, "$"))])
+            elif not raw:
+                return
+            elif raw.strip():
+                try:
+                    line = raw.decode(encoding)
+                except UnicodeDecodeError:
+                    yield BundleItem(line_index=i, issues=[ValidationIssue(code="NOT_UTF8", path=_line_path(i, "$"))])
+                else:
+                    yield _bundle_item(i, line)
+            i += 1
+
+
+def write_map_bundle(models: Iterable[MapModel], fp: IO[str]) -> int:
+    """
+    Strict export of each model (raises ValidationError on the first invalid
+    one; earlier lines are already written). Returns the number of lines.
+    """
+    n = 0
+    for model in models:
+        fp.write(export_map_to_json_text(model, indent=None))
+        fp.write("\n")
+        n += 1
+    return n
+
+
+def export_map_bundle_to_file(models: Iterable[MapModel], path: str, *, encoding: str = "utf-8") -> int:
+    with _open_text_for_write(path, encoding) as f:
+        return write_map_bundle(models, f)
+
+
+# =========================
+# Gzip (stdlib, streaming, size-guarded)
+# =========================
+#
+# Compressed output is deterministic (mtime=0, no embedded file name), so the
+# same map always yields the same .json.gz bytes. Decompression is streamed
+# and stops with DECOMPRESSED_SIZE_LIMIT once the guard is exceeded, so a
+# small bomb never expands fully in memory.
+
+GZIP_MAGIC = b"\x1f\x8b"
+MAX_DECOMPRESSED_BYTES: int = 256 * 1024 * 1024
+_GZIP_CHUNK_BYTES = 1 << 20
+
+
+def _size_limit_error() -> ValidationError:
+    return ValidationError([ValidationIssue(code="DECOMPRESSED_SIZE_LIMIT", path="$")])
+
+
+def _gzip_error() -> ValidationError:
+    return ValidationError([ValidationIssue(code="GZIP_INVALID", path="$")])
+
+
+class _GuardedReader(io.RawIOBase):
+    """
+    Raw stream over a GzipFile that raises once more than max_bytes have
+    been decompressed (None: no total cap; the caller bounds its reads).
+    """
+
+    def __init__(self, inner: gzip.GzipFile, max_bytes: Optional[int]):
+        self._inner = inner
+        self._max = max_bytes
+        self._seen = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b: Any) -> int:
+        try:
+            n = self._inner.readinto(b)
+        except (OSError, EOFError, zlib.error):
+            raise _gzip_error()
+        self._seen += n
+        if self._max is not None and self._seen > self._max:
+            raise _size_limit_error()
+        return n
+
+    def close(self) -> None:
+        try:
+            self._inner.close()
+        finally:
+            super().close()
+
+
+def is_gzip_bytes(data: bytes) -> bool:
+    return data[:2] == GZIP_MAGIC
+
+
+def _is_gzip_path(path: str) -> bool:
+    return path.lower().endswith(".gz")
+
+
+def decompress_gzip_bytes(data: bytes, *, max_decompressed_bytes: Optional[int] = None) -> bytes:
+    limit = MAX_DECOMPRESSED_BYTES if max_decompressed_bytes is None else max_decompressed_bytes
+    src = io.BytesIO(data)
+    reader = _GuardedReader(gzip.GzipFile(fileobj=src, mode="rb"), limit)
+    out = bytearray()
+    buf = bytearray(_GZIP_CHUNK_BYTES)
+    view = memoryview(buf)
+    with reader:
+        while True:
+            # Progress is compressed input consumed; the output size is unknown.
+            report_progress("decompress", src.tell(), len(data))
+            n = reader.readinto(view)
+            if not n:
+                break
+            out += view[:n]
+    return bytes(out)
+
+
+def compress_gzip_bytes(data: bytes) -> bytes:
+    # Same header/settings as _open_text_for_write, so file and download
+    # bytes match.
+    buf = io.BytesIO()
+    with gzip.GzipFile(filename="", mode="wb", fileobj=buf, mtime=0) as gz:
+        gz.write(data)
+    return buf.getvalue()
+
+
+def export_map_to_gzip_bytes(model: MapModel, *, indent: int = 2) -> bytes:
+    return compress_gzip_bytes(export_map_to_json_text(model, indent=indent).encode("utf-8"))
+
+
+def _open_bytes_for_read(path: str, max_decompressed_bytes: Optional[int], *, total_limit: bool = True) -> IO[bytes]:
+    if not _is_gzip_path(path):
+        return open(path, "rb")
+    limit: Optional[int] = None
+    if total_limit:
+        limit = MAX_DECOMPRESSED_BYTES if max_decompressed_bytes is None else max_decompressed_bytes
+    raw = _GuardedReader(gzip.GzipFile(filename=path, mode="rb"), limit)
+    return io.BufferedReader(raw, _GZIP_CHUNK_BYTES)
+
+
+def _open_text_for_read(path: str, encoding: str, max_decompressed_bytes: Optional[int]) -> IO[str]:
+    if not _is_gzip_path(path):
+        return open(path, "r", encoding=encoding)
+    return io.TextIOWrapper(_open_bytes_for_read(path, max_decompressed_bytes), encoding=encoding)
+
+
+def _open_text_for_write(path: str, encoding: str) -> IO[str]:
+    if not _is_gzip_path(path):
+        return open(path, "w", encoding=encoding, newline="\n")
+    raw = open(path, "wb")
+    gz = gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0)
+    return io.TextIOWrapper(_GzipSink(gz, raw), encoding=encoding, newline="\n")
+
+
+class _GzipSink(io.RawIOBase):
+    """
+    Write side of a .gz text stream. flush() is deliberately a no-op:
+    GzipFile.flush emits a sync marker, which would make the compressed bytes
+    depend on buffer boundaries. close() finishes the stream and closes the
+    file (GzipFile does not close a fileobj it did not open).
+    """
+
+    def __init__(self, gz: gzip.GzipFile, raw: IO[bytes]):
+        self._gz = gz
+        self._raw_file = raw
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        return self._gz.write(b)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._gz.close()
+            self._raw_file.close()
+        finally:
+            super().close()
+
+
+# =========================
+# Compact In-memory Encoding (session storage, NOT an export format)
+# =========================
+#
+# One zlib-compressed, minimally separated JSON blob per map. Unlike export,
+# schema_version is kept as-is (import accepts any 1.x.x) and no export
+# validation runs. The first byte records whether the encoded instance had
+# validated provenance, so decoding can restore it without revalidating.
+
+_COMPACT_VALIDATED = b"V"
+_COMPACT_UNVALIDATED = b"U"
+
+
+def encode_map_compact(model: MapModel) -> bytes:
+    data = [
+        model.schema_version,
+        model.map_id,
+        model.title,
+        [[p.id, p.label, p.category] for p in model.parts],
+        [[r.id, r.source_part_id, r.target_part_id, r.type] for r in model.relationships],
+        [
+            model.trailhead.trigger,
+            list(model.trailhead.dominant_protector_patterns),
+            list(model.trailhead.core_vulnerability_themes),
+        ],
+    ]
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    flag = _COMPACT_VALIDATED if is_validated_model(model) else _COMPACT_UNVALIDATED
+    return flag + zlib.compress(text.encode("utf-8"), 1)
+
+
+def decode_map_compact(blob: bytes) -> MapModel:
+    """
+    Inverse of encode_map_compact. Only for blobs this process produced.
+    """
+    flag, payload = blob[:1], blob[1:]
+    schema_version, map_id, title, parts, rels, th = json.loads(zlib.decompress(payload).decode("utf-8"))
+    model = MapModel(
+        schema_version=schema_version,
+        map_id=map_id,
+        title=title,
+        parts=[Part(id=a, label=b, category=c) for a, b, c in parts],
+        relationships=[Relationship(id=a, source_part_id=b, target_part_id=c, type=d) for a, b, c, d in rels],
+        trailhead=Trailhead(trigger=th[0], dominant_protector_patterns=th[1], core_vulnerability_themes=th[2]),
+    )
+    if flag == _COMPACT_VALIDATED:
+        _mark_validated(model)
+    return model
+
+
+# =========================
+# Helper: canonicalize relationships (NOT used automatically)
+# =========================
+
+def canonicalize_polarized_with_in_model(model: MapModel) -> MapModel:
+    """
+    This function exists for *developer-only* remediation workflows.
+    V1 runtime rules are strict; import rejects non-canonical ordering.
+    If you want a repair tool later, call this intentionally (but do not wire into UI without spec permission).
+    """
+    from .models import Relationship, MapModel as MM  # local import to avoid cycles
+
+    new_rels = []
+    for r in model.relationships:
+        if r.type == "polarized_with":
+            a, b = canonicalize_polarized_endpoints(r.source_part_id, r.target_part_id)
+            new_rels.append(Relationship(id=r.id, source_part_id=a, target_part_id=b, type=r.type))
+        else:
+            new_rels.append(r)
+
+    return MM(
+        schema_version=model.schema_version,
+        map_id=model.map_id,
+        title=model.title,
+        parts=model.parts,
+        relationships=new_rels,
+        trailhead=model.trailhead,
+    )
+
+
+def canonicalize_polarized_with_in_dict(map_dict: Any) -> Any:
+    """
+    Dict-level counterpart of canonicalize_polarized_with_in_model, for
+    remediation before strict validation (which rejects non-canonical order).
+    Returns a shallow copy with polarized_with endpoints ordered; anything
+    malformed is left as-is for validate_map_dict_strict to report.
+    """
+    if not isinstance(map_dict, dict) or not isinstance(map_dict.get("relationships"), list):
+        return map_dict
+    rels = []
+    for r in map_dict["relationships"]:
+        if (
+            isinstance(r, dict)
+            and r.get("type") == "polarized_with"
+            and isinstance(r.get("source_part_id"), str)
+            and isinstance(r.get("target_part_id"), str)
+        ):
+            a, b = canonicalize_polarized_endpoints(r["source_part_id"], r["target_part_id"])
+            if (a, b) != (r["source_part_id"], r["target_part_id"]):
+                r = {**r, "source_part_id": a, "target_part_id": b}
+        rels.append(r)
+    return {**map_dict, "relationships": rels}
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from . import io_json
+from .models import MapModel
+from .progress import Cancelled, Progress, ProgressReporter, progress_scope
+from .validate import ValidationError
+
+
+# =========================
+# Background Jobs (worker thread, cancellable, session-local)
+# =========================
+#
+# A job runs one import or export on a daemon thread. The worker never
+# touches Streamlit session state; the script thread polls status() and
+# applies the result itself (see app.py), so map + issues change together.
+#
+# Note: json.loads is a single C call that holds the GIL; cancellation and
+# progress take effect at the next checkpoint after it returns.
+
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class BackgroundJob:
+    def __init__(self, kind: str, fn: Callable[[], Any], *, tag: Any = None):
+        self.kind = kind
+        self.tag = tag
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self._fn = fn
+        self._status = RUNNING
+        self._reporter = ProgressReporter()
+        self._thread = threading.Thread(target=self._run, name=f"ifs-mapper-{kind}", daemon=True)
+
+    def start(self) -> "BackgroundJob":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            with progress_scope(self._reporter):
+                result = self._fn()
+                # Last checkpoint: a cancel that arrived during the final step wins.
+                self._reporter.update("finished", 1, 1)
+            self.result = result
+            self._status = DONE
+        except Cancelled:
+            self._status = CANCELLED
+        except BaseException as e:  # surfaced to the UI by type / issues only
+            self.error = e
+            self._status = FAILED
+
+    def cancel(self) -> None:
+        self._reporter.cancel()
+
+    def status(self) -> str:
+        return self._status
+
+    def progress(self) -> Progress:
+        return self._reporter.snapshot()
+
+    @property
+    def finished(self) -> bool:
+        return self._status != RUNNING
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._thread.join(timeout)
+        return self.finished
+
+
+def start_import_job(data: bytes, *, tag: Any = None) -> BackgroundJob:
+    return BackgroundJob("import", lambda: io_json.import_map_from_bytes(data), tag=tag).start()
+
+
+@dataclass(frozen=True, slots=True)
+class ExportResult:
+    """
+    Canonical export bytes plus the round-trip status ("PASS" / "FAIL") of a
+    strict re-import of exactly those bytes; gz is the gzip form when requested.
+    """
+    data: bytes
+    round_trip: str
+    gz: Optional[bytes] = None
+
+
+def export_with_round_trip(model: MapModel, *, compress: bool = False) -> ExportResult:
+    """
+    Raises ValidationError if the model cannot be exported.
+    """
+    data = io_json.export_map_to_json_text(model, indent=2).encode("utf-8")
+    try:
+        m2 = io_json.import_map_from_json_bytes(data)
+        ok = (
+            m2.schema_version == model.schema_version
+            and len(m2.parts) == len(model.parts)
+            and len(m2.relationships) == len(model.relationships)
+            and m2.map_id == model.map_id
+        )
+    except ValidationError:
+        ok = False
+    gz = io_json.compress_gzip_bytes(data) if compress else None
+    return ExportResult(data=data, round_trip="PASS" if ok else "FAIL", gz=gz)
+
+
+def start_export_job(model: MapModel, *, tag: Any = None, compress: bool = False) -> BackgroundJob:
+    return BackgroundJob("export", lambda: export_with_round_trip(model, compress=compress), tag=tag).start()
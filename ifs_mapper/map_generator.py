@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from typing import Any, Dict, List, Set, Tuple
+
+from .validate import ALLOWED_PART_CATEGORIES, EXPORT_SCHEMA_VERSION, canonicalize_polarized_endpoints
+
+
+# =========================
+# Synthetic Map Generator (developer / benchmark use only)
+# =========================
+#
+# Produces valid canonical V1 map dicts with neutral placeholder text.
+# Nothing here is user content and nothing is inferred; the structure is
+# random (seeded) so benchmarks and load tests are reproducible.
+
+_CATEGORIES: List[str] = sorted(ALLOWED_PART_CATEGORIES)
+
+
+def generate_map_dict(
+    n_parts: int,
+    n_relationships: int,
+    *,
+    seed: int = 0,
+    polarized_ratio: float = 0.25,
+    map_id: str = "generated-map",
+) -> Dict[str, Any]:
+    """
+    Build a valid V1 map dict:
+      - part ids "p000000".. with placeholder labels
+      - relationships never self-loop; polarized_with pairs are unique and
+        stored in canonical endpoint order
+      - n_relationships is capped by what the part count allows
+    """
+    if n_parts < 2:
+        n_relationships = 0
+    rng = random.Random(seed)
+    width = max(6, len(str(max(n_parts - 1, 0))))
+    part_ids = [f"p{i:0{width}d}" for i in range(n_parts)]
+
+    parts = [
+        {"id": pid, "label": f"Part {i}", "category": _CATEGORIES[i % len(_CATEGORIES)]}
+        for i, pid in enumerate(part_ids)
+    ]
+
+    max_pairs = n_parts * (n_parts - 1) // 2
+    n_polarized = min(int(n_relationships * polarized_ratio), max_pairs)
+    relationships: List[Dict[str, str]] = []
+    seen_pairs: Set[Tuple[str, str]] = set()
+
+    while len(seen_pairs) < n_polarized:
+        a, b = rng.sample(part_ids, 2)
+        pair = canonicalize_polarized_endpoints(a, b)
+        if pair in seen_pairs:
+            continue
+        seen_pairs.add(pair)
+        relationships.append({
+            "id": f"r{len(relationships)}",
+            "source_part_id": pair[0],
+            "target_part_id": pair[1],
+            "type": "polarized_with",
+        })
+
+    for _ in range(n_relationships - n_polarized if n_parts >= 2 else 0):
+        src, tgt = rng.sample(part_ids, 2)
+        relationships.append({
+            "id": f"r{len(relationships)}",
+            "source_part_id": src,
+            "target_part_id": tgt,
+            "type": "protects",
+        })
+
+    return {
+        "schema_version": EXPORT_SCHEMA_VERSION,
+        "map_id": map_id,
+        "title": "Generated Map",
+        "parts": parts,
+        "relationships": relationships,
+        "trailhead": {
+            "trigger": "PLACEHOLDER",
+            "dominant_protector_patterns": ["PLACEHOLDER"],
+            "core_vulnerability_themes": ["PLACEHOLDER"],
+        },
+    }
+
+
+def generate_map_json_text(n_parts: int, n_relationships: int, *, seed: int = 0, indent: int = 2) -> str:
+    """
+    Same encoding as io_json.export_map_to_json_text (sorted keys, no ASCII escaping).
+    """
+    data = generate_map_dict(n_parts, n_relationships, seed=seed)
+    return json.dumps(data, ensure_ascii=False, indent=indent, sort_keys=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Write a synthetic V1 map (placeholder text only).")
+    ap.add_argument("--parts", type=int, default=1000)
+    ap.add_argument("--relationships", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    text = generate_map_json_text(args.parts, args.relationships, seed=args.seed)
+    with open(args.out, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -62,7 +62,7 @@ class Trailhead:
     core_vulnerability_themes: List[str]
 
 
-@dataclass(frozen=True, slots=True)
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class MapModel:
     """
     V1 contract: required fields only
@@ -72,6 +72,10 @@ class MapModel:
       - parts: List[Part]
       - relationships: List[Relationship]
       - trailhead: Trailhead
+
+    Notes:
+      - weakref_slot exists only so validate.py can track validated provenance
+        without keeping models alive; it adds no field.
     """
     schema_version: str
     map_id: str
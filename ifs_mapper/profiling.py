@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# =========================
+# Local Phase Profiling (Opt-in, In-process Only)
+# =========================
+#
+# Privacy rule: only fixed phase names, durations, element counts and byte
+# sizes are recorded. Nothing here ever sees labels, ids or trailhead text,
+# and nothing is written anywhere; results live only in the caller's
+# PhaseProfile / callback (no telemetry).
+#
+# Instrumented code calls phase_start/phase_end. With no active profile these
+# are a single ContextVar lookup and return immediately.
+
+
+@dataclass(frozen=True, slots=True)
+class PhaseTiming:
+    """
+    One completed phase:
+      - name: fixed phase name (e.g. "json_parse", "validate_parts")
+      - seconds: wall time (perf_counter)
+      - count: elements processed (parts, relationships, characters, ...)
+      - peak_bytes: peak traced allocation above phase start, if tracked
+    """
+    name: str
+    seconds: float
+    count: int
+    peak_bytes: Optional[int]
+
+
+@dataclass(slots=True)
+class PhaseProfile:
+    """
+    Collected phases, in completion order.
+    """
+    phases: List[PhaseTiming] = field(default_factory=list)
+
+    def total_seconds(self) -> float:
+        return sum(p.seconds for p in self.phases)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate by phase name: {"name": {"seconds", "count", "calls", "peak_bytes"}}.
+        """
+        out: Dict[str, Dict[str, float]] = {}
+        for p in self.phases:
+            row = out.setdefault(p.name, {"seconds": 0.0, "count": 0, "calls": 0, "peak_bytes": 0})
+            row["seconds"] += p.seconds
+            row["count"] += p.count
+            row["calls"] += 1
+            if p.peak_bytes is not None:
+                row["peak_bytes"] = max(row["peak_bytes"], p.peak_bytes)
+        return out
+
+
+PhaseCallback = Callable[[PhaseTiming], None]
+
+
+@dataclass(slots=True)
+class _Collector:
+    profile: PhaseProfile
+    track_memory: bool
+    on_phase: Optional[PhaseCallback]
+
+
+@dataclass(slots=True)
+class PhaseToken:
+    collector: _Collector
+    name: str
+    started: float
+    mem_start: int
+
+
+_ACTIVE: ContextVar[Optional[_Collector]] = ContextVar("ifs_mapper_v1_profile", default=None)
+
+
+def phase_start(name: str) -> Optional[PhaseToken]:
+    """
+    Begin a phase. Returns None (no-op) when no profile is active.
+    Phases are meant to be sequential; nested phases share tracemalloc's
+    peak counter, so their peak_bytes are approximate.
+    """
+    c = _ACTIVE.get()
+    if c is None:
+        return None
+    mem_start = 0
+    if c.track_memory and tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        mem_start = tracemalloc.get_traced_memory()[0]
+    return PhaseToken(collector=c, name=name, started=time.perf_counter(), mem_start=mem_start)
+
+
+def phase_end(token: Optional[PhaseToken], count: int = 0) -> None:
+    """
+    Finish a phase started by phase_start. Safe to call with None.
+    A phase interrupted by an exception is simply not recorded.
+    """
+    if token is None:
+        return
+    elapsed = time.perf_counter() - token.started
+    c = token.collector
+    peak: Optional[int] = None
+    if c.track_memory and tracemalloc.is_tracing():
+        peak = max(0, tracemalloc.get_traced_memory()[1] - token.mem_start)
+    timing = PhaseTiming(name=token.name, seconds=elapsed, count=int(count), peak_bytes=peak)
+    c.profile.phases.append(timing)
+    if c.on_phase is not None:
+        c.on_phase(timing)
+
+
+@contextmanager
+def profile_phases(
+    *,
+    track_memory: bool = False,
+    on_phase: Optional[PhaseCallback] = None,
+) -> Iterator[PhaseProfile]:
+    """
+    Collect io_json / validate phase timings for the enclosed block:
+
+        with profile_phases(track_memory=True) as prof:
+            io_json.import_map_from_json_text(text)
+        prof.summary()
+
+    track_memory starts tracemalloc for the block if it is not already running
+    (and stops it afterwards); it slows the profiled code noticeably.
+    on_phase is called synchronously with each PhaseTiming as it completes.
+    Scoped to the current thread / asyncio task via ContextVar.
+    """
+    profile = PhaseProfile()
+    started_tracing = False
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+    token = _ACTIVE.set(_Collector(profile=profile, track_memory=track_memory, on_phase=on_phase))
+    try:
+        yield profile
+    finally:
+        _ACTIVE.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+# =========================
+# Cooperative Progress / Cancellation (In-process Only)
+# =========================
+#
+# Long-running io_json / validate work reports (stage, done, total) through
+# report_progress. Stages are fixed names and numbers are counts; no user
+# content. With no active reporter the call is a single ContextVar lookup.
+# Callers check only every PROGRESS_EVERY elements to keep loops cheap.
+
+PROGRESS_EVERY: int = 1024
+
+
+class Cancelled(Exception):
+    """
+    Raised inside the worker at the next progress checkpoint after cancel().
+    """
+
+
+@dataclass(frozen=True, slots=True)
+class Progress:
+    stage: str
+    done: int
+    total: int
+
+
+class ProgressReporter:
+    """
+    Thread-safe enough for one writer (worker) and many readers (UI):
+    the snapshot is replaced as a whole, never mutated.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot = Progress(stage="queued", done=0, total=0)
+        self._cancel = threading.Event()
+
+    def update(self, stage: str, done: int, total: int) -> None:
+        self._snapshot = Progress(stage=stage, done=done, total=total)
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def snapshot(self) -> Progress:
+        return self._snapshot
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+
+_ACTIVE: ContextVar[Optional[ProgressReporter]] = ContextVar("ifs_mapper_v1_progress", default=None)
+
+
+def report_progress(stage: str, done: int, total: int) -> None:
+    r = _ACTIVE.get()
+    if r is None:
+        return
+    r.update(stage, done, total)
+
+
+@contextmanager
+def progress_scope(reporter: ProgressReporter) -> Iterator[ProgressReporter]:
+    token = _ACTIVE.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _ACTIVE.reset(token)
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import io_json
+from .validate import ValidationError, ValidationIssue, validate_map_dict_strict
+
+
+# =========================
+# Local Validation / Canonicalization Service (stdlib asyncio)
+# =========================
+#
+# Localhost-only HTTP/1.1 (or Unix socket) front end over strict import,
+# canonical export and polarized canonicalization. CPU work runs in a warm
+# worker pool; the event loop only parses HTTP and enforces limits.
+#
+# Privacy: responses carry issue codes + structural paths only. Nothing is
+# persisted and nothing is logged (no access log, no error bodies echoed).
+#
+# Endpoints:
+#   GET  /health        -> {"ok": true}
+#   POST /validate      -> {"ok": true} | {"ok": false, "issues": [...]}
+#   POST /canonicalize  -> polarized_with endpoints put in canonical order,
+#                          then canonical export text (200) | issues JSON (422)
+# Request bodies are V1 map JSON (UTF-8), optionally gzip-compressed. A gzip
+# body may expand to at most max_decompressed_bytes (default: the body limit)
+# or the worker stops and answers 413 DECOMPRESSED_SIZE_LIMIT.
+
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES: int = 32 * 1024 * 1024
+MAX_HEADER_BYTES: int = 16 * 1024
+READ_TIMEOUT_S: float = 30.0
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+# ---------- worker functions (module-level so process pools can pickle them) ----------
+
+def _issues_payload(issues: List[ValidationIssue]) -> Dict[str, Any]:
+    return {"ok": False, "issues": [{"code": i.code, "path": i.path} for i in issues]}
+
+
+def _issues_response(issues: List[ValidationIssue]) -> Tuple[int, bytes]:
+    status = 413 if any(i.code == "DECOMPRESSED_SIZE_LIMIT" for i in issues) else 422
+    return status, json.dumps(_issues_payload(issues)).encode("utf-8")
+
+
+def _load(body: bytes, max_decompressed_bytes: int) -> Any:
+    try:
+        return io_json.import_map_from_bytes(body, max_decompressed_bytes=max_decompressed_bytes)
+    except ValidationError as e:
+        # import_map_from_json_text raises with no issues on a JSON parse error.
+        return e.issues or [ValidationIssue(code="JSON_PARSE_ERROR", path="$")]
+    except UnicodeDecodeError:
+        return [ValidationIssue(code="NOT_UTF8", path="$")]
+
+
+def work_validate(body: bytes, max_decompressed_bytes: int = MAX_BODY_BYTES) -> Tuple[int, bytes]:
+    result = _load(body, max_decompressed_bytes)
+    if isinstance(result, list):
+        return _issues_response(result)
+    return 200, b'{"ok": true}'
+
+
+def _parse_json(body: bytes, max_decompressed_bytes: int) -> Any:
+    # Same input handling as import_map_from_bytes, stopping at the parsed dict.
+    if io_json.is_gzip_bytes(body):
+        body = io_json.decompress_gzip_bytes(body, max_decompressed_bytes=max_decompressed_bytes)
+    try:
+        return json.loads(body.decode("utf-8"))
+    except UnicodeDecodeError:
+        raise ValidationError([ValidationIssue(code="NOT_UTF8", path="$")])
+    except (json.JSONDecodeError, RecursionError):
+        raise ValidationError([ValidationIssue(code="JSON_PARSE_ERROR", path="$")])
+
+
+def work_canonicalize(body: bytes, max_decompressed_bytes: int = MAX_BODY_BYTES) -> Tuple[int, bytes]:
+    # Order polarized_with endpoints before strict validation, which would
+    # otherwise reject exactly the inputs this endpoint exists to fix.
+    try:
+        data = io_json.canonicalize_polarized_with_in_dict(_parse_json(body, max_decompressed_bytes))
+        model = validate_map_dict_strict(data)
+        text = io_json.export_map_to_json_text(model, indent=2)
+    except ValidationError as e:
+        return _issues_response(e.issues)
+    return 200, text.encode("utf-8")
+
+
+def _noop() -> None:
+    return None
+
+
+_ROUTES = {
+    "/validate": work_validate,
+    "/canonicalize": work_canonicalize,
+}
+
+
+# ---------- HTTP plumbing ----------
+
+class _HttpError(Exception):
+    def __init__(self, status: int, code: str):
+        super().__init__(code)
+        self.status = status
+        self.code = code
+
+
+def _response(status: int, body: bytes, *, keep_alive: bool, content_type: str = "application/json") -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Cache-Control: no-store\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("ascii") + body
+
+
+def _error_body(code: str) -> bytes:
+    return json.dumps({"ok": False, "issues": [{"code": code, "path": "$"}]}).encode("utf-8")
+
+
+async def _read_request(reader: asyncio.StreamReader, max_body: int) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    try:
+        raw = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), READ_TIMEOUT_S)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None  # clean close between requests
+        raise _HttpError(400, "BAD_REQUEST")
+    except asyncio.LimitOverrunError:
+        raise _HttpError(431, "HEADERS_TOO_LARGE")
+    except asyncio.TimeoutError:
+        raise _HttpError(408, "TIMEOUT")
+
+    try:
+        lines = raw.decode("latin-1").split("\r\n")
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise _HttpError(400, "BAD_REQUEST")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise _HttpError(400, "BAD_REQUEST")
+        headers[name.strip().lower()] = value.strip()
+
+    body = b""
+    if method != "POST":
+        # No route reads a body on other methods. Unread body bytes would be
+        # parsed as the next request on a keep-alive connection, so refuse
+        # (the connection is then closed).
+        if "transfer-encoding" in headers or headers.get("content-length", "0").strip() != "0":
+            raise _HttpError(400, "BAD_REQUEST")
+    else:
+        if "transfer-encoding" in headers:
+            raise _HttpError(411, "LENGTH_REQUIRED")
+        try:
+            length = int(headers["content-length"])
+        except (KeyError, ValueError):
+            raise _HttpError(411, "LENGTH_REQUIRED")
+        if length < 0 or length > max_body:
+            raise _HttpError(413, "REQUEST_TOO_LARGE")
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT_S)
+        except asyncio.IncompleteReadError:
+            raise _HttpError(400, "BAD_REQUEST")
+        except asyncio.TimeoutError:
+            raise _HttpError(408, "TIMEOUT")
+    return method, target.split("?", 1)[0], headers, body
+
+
+class MapService:
+    def __init__(
+        self,
+        make_executor: Callable[[], Executor],
+        *,
+        max_body_bytes: int = MAX_BODY_BYTES,
+        max_decompressed_bytes: Optional[int] = None,
+    ):
+        self._make_executor = make_executor
+        self.executor = make_executor()
+        self.max_body_bytes = max_body_bytes
+        self.max_decompressed_bytes = max_body_bytes if max_decompressed_bytes is None else max_decompressed_bytes
+
+    async def _run(self, fn: Callable[[bytes, int], Tuple[int, bytes]], body: bytes) -> Tuple[int, bytes]:
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, fn, body, self.max_decompressed_bytes)
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool; replace it once (other
+            # requests may hit the same broken pool) so later requests work.
+            # The new pool starts workers lazily, which is safe without fork.
+            if self.executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._make_executor()
+            return 500, _error_body("INTERNAL_ERROR")
+        except Exception:  # never echo details
+            return 500, _error_body("INTERNAL_ERROR")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    req = await _read_request(reader, self.max_body_bytes)
+                except _HttpError as e:
+                    writer.write(_response(e.status, _error_body(e.code), keep_alive=False))
+                    await writer.drain()
+                    return
+                if req is None:
+                    return
+                method, path, headers, body = req
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                if path == "/health":
+                    status, out, ctype = (200, b'{"ok": true}', "application/json") if method == "GET" else (
+                        405, _error_body("METHOD_NOT_ALLOWED"), "application/json")
+                elif path in _ROUTES:
+                    if method != "POST":
+                        status, out, ctype = 405, _error_body("METHOD_NOT_ALLOWED"), "application/json"
+                    else:
+                        status, out = await self._run(_ROUTES[path], body)
+                        ctype = "application/json"
+                else:
+                    status, out, ctype = 404, _error_body("NOT_FOUND"), "application/json"
+
+                writer.write(_response(status, out, keep_alive=keep_alive, content_type=ctype))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.CancelledError):
+            return
+        finally:
+            writer.close()
+
+
+def make_executor(workers: int, *, use_threads: bool = False) -> Executor:
+    """
+    Process workers never fork from the serving process: with the default
+    "fork" start method a worker started lazily after accept() would inherit
+    client connections and the listening socket (a "Connection: close" client
+    would then never see EOF). forkserver / spawn children start clean.
+    """
+    if use_threads:
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ifs-mapper-service")
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def warm_executor(executor: Executor, workers: int) -> None:
+    """
+    Start all workers (one no-op each) before serving, so the first requests
+    do not pay process start-up.
+    """
+    for f in [executor.submit(_noop) for _ in range(workers)]:
+        f.result()
+
+
+async def serve(
+    *,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    unix_path: Optional[str] = None,
+    workers: int = 0,
+    use_threads: bool = False,
+    max_body_bytes: int = MAX_BODY_BYTES,
+    max_decompressed_bytes: Optional[int] = None,
+    ready: Optional[asyncio.Event] = None,
+) -> None:
+    """
+    Run until cancelled. Binds loopback only (or a 0600 Unix socket).
+    """
+    if unix_path is None and host not in LOOPBACK_HOSTS:
+        raise ValueError("service binds to loopback only")
+    n = workers or max(1, (os.cpu_count() or 2) - 1)
+    service = MapService(
+        lambda: make_executor(n, use_threads=use_threads),
+        max_body_bytes=max_body_bytes,
+        max_decompressed_bytes=max_decompressed_bytes,
+    )
+    limit = MAX_HEADER_BYTES
+    try:
+        warm_executor(service.executor, n)
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(service.handle, path=unix_path, limit=limit)
+            os.chmod(unix_path, 0o600)
+        else:
+            server = await asyncio.start_server(service.handle, host=host, port=port, limit=limit)
+        async with server:
+            if ready is not None:
+                ready.set()
+            await server.serve_forever()
+    finally:
+        service.executor.shutdown(wait=False, cancel_futures=True)
+        if unix_path is not None and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Local V1 map validation/canonicalization service (loopback only).")
+    ap.add_argument("--host", default="127.0.0.1", choices=sorted(LOOPBACK_HOSTS))
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--unix", dest="unix_path", default=None, help="serve on a Unix socket instead of TCP")
+    ap.add_argument("--workers", type=int, default=0, help="worker processes (default: CPUs - 1)")
+    ap.add_argument("--threads", action="store_true", help="use a thread pool instead of processes")
+    ap.add_argument("--max-body-bytes", type=int, default=MAX_BODY_BYTES)
+    ap.add_argument(
+        "--max-decompressed-bytes", type=int, default=None, help="gzip body expansion limit (default: --max-body-bytes)"
+    )
+    args = ap.parse_args(argv)
+    # SIGTERM takes the Ctrl-C path so serve() shuts the worker pool down
+    # instead of leaving forkserver workers orphaned.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(
+            host=args.host,
+            port=args.port,
+            unix_path=args.unix_path,
+            workers=args.workers,
+            use_threads=args.threads,
+            max_body_bytes=args.max_body_bytes,
+            max_decompressed_bytes=args.max_decompressed_bytes,
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .models import Relationship
+
+
+# =========================
+# Spatial Index for a Laid-out Map (viewport culling / hit-testing)
+# =========================
+#
+# Positions come from whatever layout draws the graph; this module only
+# indexes them. Loose quadtrees hold part points and relationship segment
+# bounding boxes, so a viewport query or hit test visits O(log n + k) items
+# instead of every node and edge.
+#
+# Visual guardrail (spec): level-of-detail never selects by degree,
+# centrality or any other importance measure. Edges are dropped only when
+# they would be too short to see at the current zoom, and any remaining cap
+# is applied in plain id order.
+
+Point = Tuple[float, float]
+
+_MAX_ITEMS = 16
+_MAX_DEPTH = 16
+
+
+@dataclass(frozen=True, slots=True)
+class Rect:
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+    def intersects(self, o: "Rect") -> bool:
+        return self.x0 <= o.x1 and o.x0 <= self.x1 and self.y0 <= o.y1 and o.y0 <= self.y1
+
+    def contains(self, o: "Rect") -> bool:
+        return self.x0 <= o.x0 and self.y0 <= o.y0 and o.x1 <= self.x1 and o.y1 <= self.y1
+
+    @staticmethod
+    def around(x: float, y: float, r: float) -> "Rect":
+        return Rect(x - r, y - r, x + r, y + r)
+
+
+@dataclass(frozen=True, slots=True)
+class ViewportItems:
+    part_ids: List[str]
+    relationship_ids: List[str]
+
+
+# Item kinds
+PART = "part"
+RELATIONSHIP = "relationship"
+
+_Item = Tuple[str, str, Rect]
+
+
+class _QuadNode:
+    """
+    Loose quadtree node: an item lives in the child holding its centre when
+    it is no larger than that child's cell, so items straddling a split line
+    still sink instead of piling up at the root. Query bounds are the cell
+    grown by half its size on each side.
+    """
+
+    __slots__ = ("cell", "loose", "depth", "items", "children")
+
+    def __init__(self, cell: Rect, depth: int):
+        self.cell = cell
+        hw, hh = (cell.x1 - cell.x0) / 2.0, (cell.y1 - cell.y0) / 2.0
+        self.loose = Rect(cell.x0 - hw, cell.y0 - hh, cell.x1 + hw, cell.y1 + hh)
+        self.depth = depth
+        self.items: List[_Item] = []
+        self.children: Optional[List["_QuadNode"]] = None
+
+    def _child_for(self, r: Rect) -> Optional["_QuadNode"]:
+        assert self.children is not None
+        c = self.cell
+        hw, hh = (c.x1 - c.x0) / 2.0, (c.y1 - c.y0) / 2.0
+        if r.x1 - r.x0 > hw or r.y1 - r.y0 > hh:
+            return None
+        mx, my = c.x0 + hw, c.y0 + hh
+        cx, cy = (r.x0 + r.x1) / 2.0, (r.y0 + r.y1) / 2.0
+        return self.children[(1 if cx >= mx else 0) + (2 if cy >= my else 0)]
+
+    def _split(self) -> None:
+        c = self.cell
+        mx, my = (c.x0 + c.x1) / 2.0, (c.y0 + c.y1) / 2.0
+        d = self.depth + 1
+        self.children = [
+            _QuadNode(Rect(c.x0, c.y0, mx, my), d),
+            _QuadNode(Rect(mx, c.y0, c.x1, my), d),
+            _QuadNode(Rect(c.x0, my, mx, c.y1), d),
+            _QuadNode(Rect(mx, my, c.x1, c.y1), d),
+        ]
+        keep: List[_Item] = []
+        for item in self.items:
+            child = self._child_for(item[2])
+            if child is None:
+                keep.append(item)
+            else:
+                child.insert(item)
+        self.items = keep
+
+    def insert(self, item: _Item) -> None:
+        node = self
+        while node.children is not None:
+            child = node._child_for(item[2])
+            if child is None:
+                break
+            node = child
+        node.items.append(item)
+        if node.children is None and len(node.items) > _MAX_ITEMS and node.depth < _MAX_DEPTH:
+            node._split()
+
+    def query(self, r: Rect, out: List[_Item]) -> None:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if not node.loose.intersects(r):
+                continue
+            for item in node.items:
+                if item[2].intersects(r):
+                    out.append(item)
+            if node.children is not None:
+                stack.extend(node.children)
+
+
+def _segment_distance(px: float, py: float, a: Point, b: Point) -> float:
+    ax, ay = a
+    bx, by = b
+    dx, dy = bx - ax, by - ay
+    denom = dx * dx + dy * dy
+    t = 0.0 if denom == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / denom))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+class SpatialIndex:
+    """
+    Built once per layout (O(n log n)); rebuild when positions change.
+    Relationships whose endpoints have no position are not indexed.
+    Coordinates are layout (world) units; `scale` converts to screen pixels.
+    """
+
+    def __init__(self, positions: Mapping[str, Point], relationships: Iterable[Relationship]):
+        self._pos: Dict[str, Point] = dict(positions)
+        self._edges: Dict[str, Tuple[Point, Point]] = {}
+        for r in relationships:
+            a = self._pos.get(r.source_part_id)
+            b = self._pos.get(r.target_part_id)
+            if a is not None and b is not None:
+                self._edges[r.id] = (a, b)
+
+        xs = [p[0] for p in self._pos.values()] or [0.0]
+        ys = [p[1] for p in self._pos.values()] or [0.0]
+        # Square root cell keeps quadrants balanced for elongated layouts.
+        side = max(max(xs) - min(xs), max(ys) - min(ys), 1.0) * 1.01
+        x0, y0 = min(xs) - side * 0.005, min(ys) - side * 0.005
+        root = Rect(x0, y0, x0 + side, y0 + side)
+        # Separate trees: a part hit never has to look at edge candidates.
+        self._parts = _QuadNode(root, 0)
+        self._rels = _QuadNode(root, 0)
+
+        for pid, (x, y) in self._pos.items():
+            self._parts.insert((PART, pid, Rect(x, y, x, y)))
+        for rid, ((ax, ay), (bx, by)) in self._edges.items():
+            self._rels.insert((RELATIONSHIP, rid, Rect(min(ax, bx), min(ay, by), max(ax, bx), max(ay, by))))
+
+    def query(self, viewport: Rect) -> ViewportItems:
+        """
+        Parts inside the viewport and relationships whose bounding box meets
+        it (a superset of edges crossing it). Ids are sorted for determinism.
+        """
+        parts: List[_Item] = []
+        rels: List[_Item] = []
+        self._parts.query(viewport, parts)
+        self._rels.query(viewport, rels)
+        return ViewportItems(
+            part_ids=sorted(i for _, i, _ in parts),
+            relationship_ids=sorted(i for _, i, _ in rels),
+        )
+
+    def visible_relationships(
+        self,
+        viewport: Rect,
+        *,
+        scale: float = 1.0,
+        min_screen_length: float = 2.0,
+        max_edges: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Level of detail: relationships in view, minus those shorter than
+        min_screen_length pixels at this scale; then at most max_edges in id
+        order. No importance-based selection.
+        """
+        out: List[str] = []
+        min_world = min_screen_length / scale if scale > 0 else 0.0
+        for rid in self.query(viewport).relationship_ids:
+            (ax, ay), (bx, by) = self._edges[rid]
+            if math.hypot(bx - ax, by - ay) >= min_world:
+                out.append(rid)
+                if max_edges is not None and len(out) >= max_edges:
+                    break
+        return out
+
+    def hit_test(self, x: float, y: float, tolerance: float) -> Optional[Tuple[str, str]]:
+        """
+        Nearest part within tolerance, else nearest relationship segment
+        within tolerance. Returns (kind, id) or None. Ties break by id.
+        """
+        box = Rect.around(x, y, tolerance)
+        found: List[_Item] = []
+        self._parts.query(box, found)
+        best: Optional[Tuple[float, str]] = None
+        for _, pid, _ in found:
+            px, py = self._pos[pid]
+            d = math.hypot(px - x, py - y)
+            if d <= tolerance and (best is None or (d, pid) < best):
+                best = (d, pid)
+        if best is not None:
+            return (PART, best[1])
+
+        found = []
+        self._rels.query(box, found)
+        for _, rid, _ in found:
+            a, b = self._edges[rid]
+            d = _segment_distance(x, y, a, b)
+            if d <= tolerance and (best is None or (d, rid) < best):
+                best = (d, rid)
+        if best is not None:
+            return (RELATIONSHIP, best[1])
+        return None
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import weakref
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
-from models import MapModel, Part, Relationship, Trailhead, PartCategory, RelationshipType
+from .models import MapModel, Part, Relationship, Trailhead, RelationshipType
+from .profiling import phase_end, phase_start
+from .progress import PROGRESS_EVERY, report_progress
 
 
 # =========================
@@ -84,6 +87,80 @@ def canonicalize_polarized_endpoints(a: str, b: str) -> Tuple[str, str]:
     return (a, b) if a <= b else (b, a)
 
 
+# =========================
+# Validated Provenance (Fast Path)
+# =========================
+#
+# Models returned by validate_map_dict_strict (or that passed
+# validate_map_model_for_export) are recorded here so export and session
+# loading can skip a redundant full revalidation. The record is a snapshot of
+# the model's containers and their elements, compared by identity (never by
+# content), and entries vanish with the model.
+
+# (container, elements at validation time) for parts, relationships and the
+# two trailhead lists, plus the trailhead object itself.
+_Snapshot = Tuple[Trailhead, Tuple[Tuple[List[Any], Tuple[Any, ...]], ...]]
+
+_VALIDATED: Dict[int, Tuple["weakref.ref[MapModel]", _Snapshot]] = {}
+
+
+def _containers(model: MapModel) -> Tuple[List[Any], ...]:
+    th = model.trailhead
+    return (model.parts, model.relationships, th.dominant_protector_patterns, th.core_vulnerability_themes)
+
+
+def _snapshot(model: MapModel) -> _Snapshot:
+    # Frozen dataclasses still hold mutable lists. Holding the elements keeps
+    # their ids from being reused, so any swap, resize or in-place
+    # replacement after validation invalidates provenance.
+    return model.trailhead, tuple((c, tuple(c)) for c in _containers(model))
+
+
+def _unchanged(model: MapModel, snap: _Snapshot) -> bool:
+    th, lists = snap
+    if model.trailhead is not th:
+        return False
+    for current, (container, items) in zip(_containers(model), lists):
+        if current is not container or len(current) != len(items):
+            return False
+        for now, then in zip(current, items):
+            if now is not then:
+                return False
+    return True
+
+
+def _mark_validated(model: MapModel) -> None:
+    key = id(model)
+
+    def _forget(ref: "weakref.ref[MapModel]", key: int = key) -> None:
+        entry = _VALIDATED.get(key)
+        if entry is not None and entry[0] is ref:
+            del _VALIDATED[key]
+
+    _VALIDATED[key] = (weakref.ref(model, _forget), _snapshot(model))
+
+
+def is_validated_model(model: MapModel) -> bool:
+    """
+    True if this exact instance passed strict validation and neither its
+    containers nor any element in them has been replaced since (O(n)
+    identity checks). Hand-built models return False.
+    """
+    entry = _VALIDATED.get(id(model))
+    if entry is None:
+        return False
+    ref, snap = entry
+    return ref() is model and _unchanged(model, snap)
+
+
+def is_export_ready(model: MapModel) -> bool:
+    """
+    Fast-path check for export: validated provenance plus the export-only
+    schema_version rule (strict import accepts any 1.x.x).
+    """
+    return model.schema_version == EXPORT_SCHEMA_VERSION and is_validated_model(model)
+
+
 # =========================
 # Dict-level Strict Validation (Unknown fields forbidden)
 # =========================
@@ -100,6 +177,8 @@ def validate_map_dict_strict(map_dict: Any) -> MapModel:
     if not _is_dict(map_dict):
         raise ValidationError([ValidationIssue(code="TYPE_NOT_OBJECT", path="$")])
 
+    ph = phase_start("validate_top_level")
+
     # Top-level keys
     allowed_top = {"schema_version", "map_id", "title", "parts", "relationships", "trailhead"}
     extra = _unknown_keys(map_dict, allowed_top)
@@ -112,6 +191,7 @@ def validate_map_dict_strict(map_dict: Any) -> MapModel:
             issues.append(ValidationIssue(code="MISSING_FIELD", path=_path("$", k)))
 
     if issues:
+        phase_end(ph, count=len(map_dict))
         raise ValidationError(issues)
 
     schema_version = map_dict.get("schema_version")
@@ -129,16 +209,20 @@ def validate_map_dict_strict(map_dict: Any) -> MapModel:
     if not _is_nonempty_str(title):
         issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path="$.title"))
 
+    phase_end(ph, count=len(map_dict))
+
     # parts
+    ph = phase_start("validate_parts")
     parts_raw = map_dict.get("parts")
     if not _is_list(parts_raw):
         issues.append(ValidationIssue(code="TYPE_NOT_LIST", path="$.parts"))
         parts_raw = []
-    parts: List[Part] = []
     seen_part_ids: Set[str] = set()
 
     allowed_part = {"id", "label", "category"}
     for i, p in enumerate(parts_raw):
+        if not i % PROGRESS_EVERY:
+            report_progress("validate_parts", i, len(parts_raw))
         p_path = _idx_path("$.parts", i)
         if not _is_dict(p):
             issues.append(ValidationIssue(code="TYPE_NOT_OBJECT", path=p_path))
@@ -167,18 +251,13 @@ def validate_map_dict_strict(map_dict: Any) -> MapModel:
         cat = p.get("category")
         if not _is_str(cat):
             issues.append(ValidationIssue(code="TYPE_NOT_STRING", path=_path(p_path, "category")))
-            cat_val: Optional[PartCategory] = None
-        else:
-            if cat not in ALLOWED_PART_CATEGORIES:
-                issues.append(ValidationIssue(code="INVALID_ENUM", path=_path(p_path, "category")))
-                cat_val = None
-            else:
-                cat_val = cat  # type: ignore[assignment]
+        elif cat not in ALLOWED_PART_CATEGORIES:
+            issues.append(ValidationIssue(code="INVALID_ENUM", path=_path(p_path, "category")))
 
-        if pid is not None and _is_nonempty_str(label) and cat_val is not None:
-            parts.append(Part(id=pid, label=label, category=cat_val))
+    phase_end(ph, count=len(parts_raw))
 
     # trailhead
+    ph = phase_start("validate_trailhead")
     trail_raw = map_dict.get("trailhead")
     if not _is_dict(trail_raw):
         issues.append(ValidationIssue(code="TYPE_NOT_OBJECT", path="$.trailhead"))
@@ -221,24 +300,22 @@ def validate_map_dict_strict(map_dict: Any) -> MapModel:
                     path=_idx_path("$.trailhead.core_vulnerability_themes", j),
                 ))
 
-    trailhead = Trailhead(
-        trigger=trigger if _is_str(trigger) else "",
-        dominant_protector_patterns=[x for x in dpp if _is_nonempty_str(x)],
-        core_vulnerability_themes=[x for x in cvt if _is_nonempty_str(x)],
-    )
+    phase_end(ph, count=len(dpp) + len(cvt))
 
     # relationships
+    ph = phase_start("validate_relationships")
     rels_raw = map_dict.get("relationships")
     if not _is_list(rels_raw):
         issues.append(ValidationIssue(code="TYPE_NOT_LIST", path="$.relationships"))
         rels_raw = []
 
     allowed_rel = {"id", "source_part_id", "target_part_id", "type"}
-    relationships: List[Relationship] = []
     seen_rel_ids: Set[str] = set()
     seen_polarized_pairs: Set[Tuple[str, str]] = set()
 
     for i, r in enumerate(rels_raw):
+        if not i % PROGRESS_EVERY:
+            report_progress("validate_relationships", i, len(rels_raw))
         r_path = _idx_path("$.relationships", i)
         if not _is_dict(r):
             issues.append(ValidationIssue(code="TYPE_NOT_OBJECT", path=r_path))
@@ -305,14 +382,22 @@ def validate_map_dict_strict(map_dict: Any) -> MapModel:
 
             if (src, tgt) != (a, b):
                 issues.append(ValidationIssue(code="POLARIZED_NOT_CANONICAL_ORDER", path=r_path))
-                continue
 
-        relationships.append(Relationship(id=rid, source_part_id=src, target_part_id=tgt, type=rtype_val))
+    phase_end(ph, count=len(rels_raw))
 
     if issues:
         raise ValidationError(issues)
 
-    return MapModel(
+    # With no issues every raw element is valid as-is, so all dataclass
+    # construction happens here and profiles apart from the validate_* phases.
+    ph = phase_start("build_model")
+    parts = [Part(id=p["id"], label=p["label"], category=p["category"]) for p in parts_raw]
+    relationships = [
+        Relationship(id=r["id"], source_part_id=r["source_part_id"], target_part_id=r["target_part_id"], type=r["type"])
+        for r in rels_raw
+    ]
+    trailhead = Trailhead(trigger=trigger, dominant_protector_patterns=list(dpp), core_vulnerability_themes=list(cvt))
+    model = MapModel(
         schema_version=schema_version,
         map_id=map_id,
         title=title,
@@ -320,6 +405,9 @@ def validate_map_dict_strict(map_dict: Any) -> MapModel:
         relationships=relationships,
         trailhead=trailhead,
     )
+    _mark_validated(model)
+    phase_end(ph, count=len(parts) + len(relationships))
+    return model
 
 
 # =========================
@@ -330,7 +418,9 @@ def validate_map_model_for_export(model: MapModel) -> None:
     """
     Export rule: schema_version must be exactly "1.0.0".
     Also re-check relational constraints to prevent accidental drift.
+    On success the instance is recorded as validated (see is_export_ready).
     """
+    ph = phase_start("export_validate")
     issues: List[ValidationIssue] = []
 
     if model.schema_version != EXPORT_SCHEMA_VERSION:
@@ -343,6 +433,8 @@ def validate_map_model_for_export(model: MapModel) -> None:
         issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path="$.title"))
 
     for i, p in enumerate(model.parts):
+        if not i % PROGRESS_EVERY:
+            report_progress("export_validate_parts", i, len(model.parts))
         p_path = _idx_path("$.parts", i)
         if not _is_nonempty_str(p.id):
             issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=_path(p_path, "id")))
@@ -361,11 +453,14 @@ def validate_map_model_for_export(model: MapModel) -> None:
             issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=_idx_path("$.trailhead.core_vulnerability_themes", j)))
 
     part_ids = [p.id for p in model.parts]
-    if len(set(part_ids)) != len(part_ids):
+    part_id_set = set(part_ids)
+    if len(part_id_set) != len(part_ids):
         issues.append(ValidationIssue(code="DUPLICATE_ID", path="$.parts"))
 
     seen_polarized: Set[Tuple[str, str]] = set()
     for i, r in enumerate(model.relationships):
+        if not i % PROGRESS_EVERY:
+            report_progress("export_validate_relationships", i, len(model.relationships))
         r_path = _idx_path("$.relationships", i)
         if not _is_nonempty_str(r.id):
             issues.append(ValidationIssue(code="NONEMPTY_STRING_REQUIRED", path=_path(r_path, "id")))
@@ -379,9 +474,9 @@ def validate_map_model_for_export(model: MapModel) -> None:
         if r.source_part_id == r.target_part_id:
             issues.append(ValidationIssue(code="SELF_LOOP_FORBIDDEN", path=r_path))
 
-        if r.source_part_id not in set(part_ids):
+        if r.source_part_id not in part_id_set:
             issues.append(ValidationIssue(code="BAD_REFERENCE", path=_path(r_path, "source_part_id")))
-        if r.target_part_id not in set(part_ids):
+        if r.target_part_id not in part_id_set:
             issues.append(ValidationIssue(code="BAD_REFERENCE", path=_path(r_path, "target_part_id")))
 
         if r.type == "polarized_with":
@@ -393,5 +488,9 @@ def validate_map_model_for_export(model: MapModel) -> None:
             if (r.source_part_id, r.target_part_id) != (a, b):
                 issues.append(ValidationIssue(code="POLARIZED_NOT_CANONICAL_ORDER", path=r_path))
 
+    phase_end(ph, count=len(model.parts) + len(model.relationships))
+
     if issues:
         raise ValidationError(issues)
+
+    _mark_validated(model)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from ifs_mapper.map_generator import generate_map_json_text
+
+
+# =========================
+# Multi-session Load Test (local only, developer use)
+# =========================
+#
+# Drives many simulated Streamlit sessions against app.py in-process using
+# streamlit.testing (no server, no sockets). Each session:
+#   1. first run (empty session)
+#   2. import: upload a generated map through the sidebar file uploader and
+#      rerun until any background import / export job has been applied
+#   3. N plain reruns (each rerun renders integrity panel, export preview,
+#      map view and the sidebar export payload)
+# Sessions are kept alive until the end so memory per session reflects a
+# server holding that many concurrent users.
+#
+# Reports only timings, counts and byte sizes. Generated maps contain
+# placeholder text only.
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+@dataclass(slots=True)
+class SessionResult:
+    import_s: float = 0.0
+    rerun_s: List[float] = field(default_factory=list)
+    preview_bytes: int = 0
+    error: str = ""
+
+
+def _rss_bytes() -> int:
+    # Current RSS on Linux; peak RSS elsewhere (best effort).
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+_JOB_KEYS = ("ifs_mapper_v1_import_job", "ifs_mapper_v1_export_job")
+
+
+class JobNotPolled(Exception):
+    """A run left a job pending without rendering the progress fragment."""
+
+
+def _wait_for_jobs(at: Any, timeout: float) -> None:
+    # AppTest does not tick fragments on a timer, so poll with full reruns.
+    # Each run that leaves an unfinished job must have rendered the polling
+    # fragment (its progress bar); otherwise a real browser would never
+    # rerun and the job would never be applied. A job that finished during
+    # the run makes the fragment request a rerun instead of drawing.
+    deadline = time.perf_counter() + timeout
+    while True:
+        pending = [at.session_state[k] for k in _JOB_KEYS if k in at.session_state and at.session_state[k] is not None]
+        if not pending:
+            break
+        if not len(at.sidebar.get("progress")) and not all(j.finished for j in pending):
+            raise JobNotPolled()
+        if time.perf_counter() > deadline:
+            raise TimeoutError()
+        time.sleep(0.02)
+        at.run()
+
+
+def _run_session(payload: bytes, reruns: int, timeout: float, keep: List[Any]) -> SessionResult:
+    from streamlit.testing.v1 import AppTest
+
+    res = SessionResult()
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        at.run()
+
+        t0 = time.perf_counter()
+        at.sidebar.file_uploader[0].set_value(("loadtest_map.json", payload, "application/json")).run()
+        _wait_for_jobs(at, timeout)
+        res.import_s = time.perf_counter() - t0
+        if at.exception:
+            res.error = "APP_EXCEPTION"
+            return res
+
+        for _ in range(reruns):
+            t0 = time.perf_counter()
+            at.run()
+            res.rerun_s.append(time.perf_counter() - t0)
+
+        if len(at.text_area):
+            res.preview_bytes = len(str(at.text_area[0].value).encode("utf-8"))
+        keep.append(at)
+    except Exception as e:  # report type only (no content)
+        res.error = type(e).__name__
+    return res
+
+
+def run_load_test(
+    *,
+    sessions: int,
+    concurrency: int,
+    parts: int,
+    relationships: int,
+    reruns: int,
+    timeout: float = 120.0,
+) -> Dict[str, Any]:
+    payload = generate_map_json_text(parts, relationships).encode("utf-8")
+    keep: List[Any] = []
+
+    gc.collect()
+    rss_before = _rss_bytes()
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(lambda _: _run_session(payload, reruns, timeout, keep), range(sessions)))
+    wall_s = time.perf_counter() - t_start
+    gc.collect()
+    rss_after = _rss_bytes()
+
+    rerun_s = [x for r in results for x in r.rerun_s]
+    import_s = [r.import_s for r in results if not r.error]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    live = max(1, len(keep))
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "map_parts": parts,
+        "map_relationships": relationships,
+        "map_bytes": len(payload),
+        "wall_s": round(wall_s, 3),
+        "reruns_total": len(rerun_s),
+        "reruns_per_s": round(len(rerun_s) / wall_s, 3) if wall_s > 0 else 0.0,
+        "rerun_p50_ms": round(_percentile(rerun_s, 50) * 1000, 2),
+        "rerun_p99_ms": round(_percentile(rerun_s, 99) * 1000, 2),
+        "rerun_mean_ms": round(statistics.fmean(rerun_s) * 1000, 2) if rerun_s else 0.0,
+        "import_p50_ms": round(_percentile(import_s, 50) * 1000, 2),
+        "import_p99_ms": round(_percentile(import_s, 99) * 1000, 2),
+        "preview_bytes": max((r.preview_bytes for r in results), default=0),
+        "rss_delta_bytes": rss_after - rss_before,
+        "rss_per_session_bytes": (rss_after - rss_before) // live,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Local multi-session load test for app.py (no network).")
+    ap.add_argument("--sessions", type=int, default=50)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--parts", type=int, default=2000)
+    ap.add_argument("--relationships", type=int, default=4000)
+    ap.add_argument("--reruns", type=int, default=5)
+    ap.add_argument("--timeout", type=float, default=120.0)
+    args = ap.parse_args()
+
+    report = run_load_test(
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        parts=args.parts,
+        relationships=args.relationships,
+        reruns=args.reruns,
+        timeout=args.timeout,
+    )
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ifs_mapper.io_json import import_map_from_json_text
+from ifs_mapper.validate import ValidationError, validate_map_dict_strict
+
+
+# =========================
+# Adversarial Worst-case Performance Suite (local only, developer use)
+# =========================
+#
+# Generates inputs built to be slow for strict import / validation and checks
+# that time and peak traced memory stay linear in input size:
+#   - growth: going from n to 4n elements may cost at most 4x * slack
+#   - absolute: seconds and peak bytes per input byte stay under stated caps
+# Exits non-zero on any violation, so complexity regressions fail the build.
+# Also checks that nesting deeper than the interpreter stack is rejected as
+# a ValidationError instead of escaping as RecursionError.
+#
+# Reports only case names, sizes, timings and issue counts. Generated maps
+# contain placeholder text only.
+
+# Growth from n to 4n may exceed 4x by at most these factors.
+TIME_GROWTH_SLACK = 2.5
+MEM_GROWTH_SLACK = 1.5
+
+# Absolute caps, per byte of the JSON text (generous: catch blow-ups, not noise).
+MAX_SECONDS_PER_BYTE = 1e-6  # 1 s per MB
+MAX_PEAK_BYTES_PER_BYTE = 40.0
+PEAK_BYTES_FLOOR = 1 << 20
+
+_PLACEHOLDER_TRAILHEAD = {
+    "trigger": "PLACEHOLDER",
+    "dominant_protector_patterns": ["PLACEHOLDER"],
+    "core_vulnerability_themes": ["PLACEHOLDER"],
+}
+
+_CATEGORIES = ("Manager", "Firefighter", "Exile", "SelfLike", "Other")
+
+
+def _map(parts: List[Dict[str, Any]], rels: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "schema_version": "1.0.0",
+        "map_id": "adversarial-map",
+        "title": "Adversarial Map",
+        "parts": parts,
+        "relationships": rels,
+        "trailhead": dict(_PLACEHOLDER_TRAILHEAD),
+    }
+
+
+def _parts(n: int, *, id_fmt: str = "p{:08d}", label: str = "Part") -> List[Dict[str, Any]]:
+    return [{"id": id_fmt.format(i), "label": label, "category": _CATEGORIES[i % 5]} for i in range(n)]
+
+
+# ---------- case generators (n -> map dict) ----------
+
+def case_missing_references(n: int) -> Dict[str, Any]:
+    # Every relationship endpoint is unknown: two BAD_REFERENCE issues each.
+    rels = [
+        {"id": f"r{i}", "source_part_id": f"missing-s{i}", "target_part_id": f"missing-t{i}", "type": "protects"}
+        for i in range(n)
+    ]
+    return _map(_parts(n), rels)
+
+
+def case_duplicate_polarized(n: int) -> Dict[str, Any]:
+    # One pair stored n times, alternating endpoint order.
+    rels = []
+    for i in range(n):
+        a, b = ("p00000000", "p00000001") if i % 2 == 0 else ("p00000001", "p00000000")
+        rels.append({"id": f"r{i}", "source_part_id": a, "target_part_id": b, "type": "polarized_with"})
+    return _map(_parts(2), rels)
+
+
+def case_long_labels(n: int) -> Dict[str, Any]:
+    return _map(_parts(n, label="L" * 2048), [])
+
+
+def case_deep_unknown_fields(n: int) -> Dict[str, Any]:
+    # Each part carries a nested unknown field (UNKNOWN_FIELD; must not be walked).
+    parts = _parts(n)
+    junk: Any = "x"
+    for _ in range(64):
+        junk = {"k": [junk]}
+    for p in parts:
+        p["junk"] = junk
+    return _map(parts, [])
+
+
+def case_near_duplicate_ids(n: int) -> Dict[str, Any]:
+    # Long shared prefixes, ids differing only in the last characters, and
+    # every relationship id also reused once (DUPLICATE_ID).
+    prefix = "p" * 256
+    parts = _parts(n, id_fmt=prefix + "{:08d}")
+    rels = [
+        {
+            "id": prefix + f"{i // 2:08d}",
+            "source_part_id": prefix + f"{i:08d}",
+            "target_part_id": prefix + f"{(i + 1) % n:08d}",
+            "type": "protects",
+        }
+        for i in range(n)
+    ]
+    return _map(parts, rels)
+
+
+CASES: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "missing_references": case_missing_references,
+    "duplicate_polarized": case_duplicate_polarized,
+    "long_labels": case_long_labels,
+    "deep_unknown_fields": case_deep_unknown_fields,
+    "near_duplicate_ids": case_near_duplicate_ids,
+}
+
+
+# ---------- measurement ----------
+
+def _run(fn: Callable[[], Any]) -> int:
+    try:
+        fn()
+    except ValidationError as e:
+        return len(e.issues)
+    return 0
+
+
+def _measure(fn: Callable[[], Any], repeats: int) -> Tuple[float, int, int]:
+    best = float("inf")
+    issues = 0
+    for _ in range(max(1, repeats)):
+        gc.collect()
+        t0 = time.perf_counter()
+        issues = _run(fn)
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _run(fn)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, issues
+
+
+def _targets(d: Dict[str, Any], text: str) -> Dict[str, Callable[[], Any]]:
+    return {
+        "import_map_from_json_text": lambda: import_map_from_json_text(text),
+        "validate_map_dict_strict": lambda: validate_map_dict_strict(d),
+    }
+
+
+def run_case(name: str, base_n: int, repeats: int) -> Tuple[List[Dict[str, Any]], List[str]]:
+    gen = CASES[name]
+    rows: List[Dict[str, Any]] = []
+    failures: List[str] = []
+    by_target: Dict[str, List[Dict[str, Any]]] = {}
+
+    for n in (base_n, base_n * 4):
+        d = gen(n)
+        text = json.dumps(d)
+        size = len(text)
+        for target, fn in _targets(d, text).items():
+            seconds, peak, issues = _measure(fn, repeats)
+            row = {
+                "case": name,
+                "target": target,
+                "n": n,
+                "input_bytes": size,
+                "seconds": round(seconds, 4),
+                "peak_bytes": peak,
+                "issues": issues,
+            }
+            rows.append(row)
+            by_target.setdefault(target, []).append(row)
+            if seconds > MAX_SECONDS_PER_BYTE * size:
+                failures.append(f"{name}/{target}/n={n}: TIME_OVER_BOUND")
+            if peak > MAX_PEAK_BYTES_PER_BYTE * size + PEAK_BYTES_FLOOR:
+                failures.append(f"{name}/{target}/n={n}: MEMORY_OVER_BOUND")
+        del d, text
+
+    for target, (small, large) in by_target.items():
+        scale = large["input_bytes"] / max(1, small["input_bytes"])
+        # Sub-millisecond timings are noise; only judge growth above that.
+        if small["seconds"] >= 1e-3 and large["seconds"] > small["seconds"] * scale * TIME_GROWTH_SLACK:
+            failures.append(f"{name}/{target}: TIME_SUPERLINEAR")
+        if large["peak_bytes"] > max(small["peak_bytes"], PEAK_BYTES_FLOOR) * scale * MEM_GROWTH_SLACK:
+            failures.append(f"{name}/{target}: MEMORY_SUPERLINEAR")
+    return rows, failures
+
+
+def check_deep_nesting(depth: int = 100_000) -> List[str]:
+    text = '{"junk": ' + "[" * depth + "]" * depth + "}"
+    try:
+        import_map_from_json_text(text)
+    except ValidationError:
+        return []
+    except RecursionError:
+        return ["deep_nesting: RECURSION_ERROR_ESCAPED"]
+    return ["deep_nesting: NOT_REJECTED"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Adversarial worst-case performance suite for strict import/validation.")
+    ap.add_argument("--n", type=int, default=5000, help="base element count (also run at 4x)")
+    ap.add_argument("--repeats", type=int, default=3, help="best-of-N timing")
+    ap.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    args = ap.parse_args(argv)
+
+    rows: List[Dict[str, Any]] = []
+    failures = check_deep_nesting()
+    for name in args.case or list(CASES):
+        case_rows, case_failures = run_case(name, args.n, args.repeats)
+        rows.extend(case_rows)
+        failures.extend(case_failures)
+
+    print(json.dumps({"results": rows, "failures": failures}, indent=2, sort_keys=True))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
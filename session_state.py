@@ -1,35 +1,405 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import gzip
+import os
+import sys
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import streamlit as st
 
-from models import MapModel
-from validate import ValidationIssue
+from ifs_mapper import io_json
+from ifs_mapper.jobs import BackgroundJob
+from ifs_mapper.models import MapModel
+from ifs_mapper.validate import ValidationError, ValidationIssue
 
 
 MAP_KEY = "ifs_mapper_v1_map"
 ISSUES_KEY = "ifs_mapper_v1_issues"
 
+# Compact mode keeps one compressed canonical blob per session instead of the
+# MapModel object graph, and decodes the model lazily once per rerun.
+MAP_BLOB_KEY = "ifs_mapper_v1_map_blob"
+MAP_VIEW_KEY = "ifs_mapper_v1_map_view"
+ISSUES_BLOB_KEY = "ifs_mapper_v1_issues_blob"
+
+# Incremented on every set_map so cached exports / jobs can tell which map
+# they belong to without holding a reference to it.
+MAP_GEN_KEY = "ifs_mapper_v1_map_gen"
+
+COMPACT_SESSION: bool = os.environ.get("IFS_MAPPER_COMPACT_SESSION", "") == "1"
+
+# Per-session cap on stored map bytes (compact: blob size; full: estimated
+# object graph size). 0 disables the cap.
+SESSION_MAP_MAX_BYTES: int = int(os.environ.get("IFS_MAPPER_SESSION_MAP_MAX_BYTES", "0") or 0)
+
 
 def init_session_state() -> None:
     if MAP_KEY not in st.session_state:
         st.session_state[MAP_KEY] = None
     if ISSUES_KEY not in st.session_state:
         st.session_state[ISSUES_KEY] = []
+    if COMPACT_SESSION:
+        if MAP_BLOB_KEY not in st.session_state:
+            st.session_state[MAP_BLOB_KEY] = None
+        if ISSUES_BLOB_KEY not in st.session_state:
+            st.session_state[ISSUES_BLOB_KEY] = None
 
 
 def get_map() -> Optional[MapModel]:
-    return st.session_state.get(MAP_KEY)
+    if not COMPACT_SESSION:
+        return st.session_state.get(MAP_KEY)
+    view = st.session_state.get(MAP_VIEW_KEY)
+    if view is not None:
+        return view
+    blob = st.session_state.get(MAP_BLOB_KEY)
+    if blob is None:
+        return None
+    view = io_json.decode_map_compact(blob)
+    st.session_state[MAP_VIEW_KEY] = view
+    return view
+
+
+def get_map_generation() -> int:
+    return st.session_state.get(MAP_GEN_KEY, 0)
 
 
 def set_map(m: Optional[MapModel]) -> None:
+    """
+    Raises ValidationError(SESSION_MEMORY_LIMIT) if the map exceeds the
+    per-session cap; the previous map is left untouched in that case.
+    """
+    blob: Optional[bytes] = None
+    if m is not None:
+        if COMPACT_SESSION:
+            blob = io_json.encode_map_compact(m)
+            _check_map_cap(len(blob))
+        elif SESSION_MAP_MAX_BYTES:
+            _check_map_cap(_approx_bytes(m))
+
+    st.session_state[MAP_GEN_KEY] = get_map_generation() + 1
+    st.session_state.pop(EXPORT_CACHE_KEY, None)
+    st.session_state.pop(EXPORT_GZ_CACHE_KEY, None)
+    st.session_state.pop(EXPORT_VIEW_KEY, None)
+    if m is None:
+        st.session_state[MAP_KEY] = None
+        st.session_state.pop(MAP_BLOB_KEY, None)
+        st.session_state.pop(MAP_VIEW_KEY, None)
+        return
+
+    if COMPACT_SESSION:
+        st.session_state[MAP_KEY] = None
+        st.session_state[MAP_BLOB_KEY] = blob
+        st.session_state[MAP_VIEW_KEY] = m
+        return
+
     st.session_state[MAP_KEY] = m
 
 
+def release_map_views() -> None:
+    """
+    Drop lazily decoded views at the end of a rerun (compact mode only), so
+    idle sessions hold just the blob.
+    """
+    if COMPACT_SESSION:
+        st.session_state.pop(MAP_VIEW_KEY, None)
+        st.session_state.pop(EXPORT_VIEW_KEY, None)
+
+
 def set_issues(issues: List[ValidationIssue]) -> None:
-    st.session_state[ISSUES_KEY] = issues
+    if not COMPACT_SESSION:
+        st.session_state[ISSUES_KEY] = issues
+        return
+    st.session_state[ISSUES_KEY] = []
+    if not issues:
+        st.session_state[ISSUES_BLOB_KEY] = None
+        return
+    # Codes and structural paths only (privacy-safe); highly repetitive, so
+    # they compress well.
+    text = "\n".join(f"{iss.code}\t{iss.path}" for iss in issues)
+    st.session_state[ISSUES_BLOB_KEY] = zlib.compress(text.encode("utf-8"), 1)
 
 
 def get_issues() -> List[ValidationIssue]:
-    return st.session_state.get(ISSUES_KEY, [])
+    if not COMPACT_SESSION:
+        return st.session_state.get(ISSUES_KEY, [])
+    blob = st.session_state.get(ISSUES_BLOB_KEY)
+    if not blob:
+        return []
+    out: List[ValidationIssue] = []
+    for line in zlib.decompress(blob).decode("utf-8").split("\n"):
+        code, path = line.split("\t", 1)
+        out.append(ValidationIssue(code=code, path=path))
+    return out
+
+
+# =========================
+# Background Jobs / Export Cache (session-local)
+# =========================
+
+IMPORT_JOB_KEY = "ifs_mapper_v1_import_job"
+EXPORT_JOB_KEY = "ifs_mapper_v1_export_job"
+EXPORT_CACHE_KEY = "ifs_mapper_v1_export_cache"
+EXPORT_GZ_CACHE_KEY = "ifs_mapper_v1_export_gz_cache"
+# Compact mode keeps only the gzip export between reruns; the plain bytes are
+# a per-rerun view dropped by release_map_views.
+EXPORT_VIEW_KEY = "ifs_mapper_v1_export_view"
+IMPORT_FILE_ID_KEY = "ifs_mapper_v1_import_file_id"
+
+
+def get_import_job() -> Optional[BackgroundJob]:
+    return st.session_state.get(IMPORT_JOB_KEY)
+
+
+def set_import_job(job: Optional[BackgroundJob]) -> None:
+    st.session_state[IMPORT_JOB_KEY] = job
+
+
+def get_export_job() -> Optional[BackgroundJob]:
+    return st.session_state.get(EXPORT_JOB_KEY)
+
+
+def set_export_job(job: Optional[BackgroundJob]) -> None:
+    st.session_state[EXPORT_JOB_KEY] = job
+
+
+# Export cache entry: (generation, data, status). status is the round-trip
+# result ("PASS" / "FAIL") when export succeeded (data is None in compact
+# mode, see EXPORT_VIEW_KEY), otherwise why export failed:
+EXPORT_BLOCKED = "BLOCKED"  # failed validation; issues hold the reasons
+EXPORT_FAILED = "FAILED"  # any other error (recorded so it is not retried every rerun)
+
+
+def _export_entry() -> Optional[Tuple[int, Optional[bytes], str]]:
+    cached = st.session_state.get(EXPORT_CACHE_KEY)
+    if cached is None or cached[0] != get_map_generation():
+        return None
+    return cached
+
+
+def get_cached_export() -> Optional[bytes]:
+    """
+    Canonical export bytes for the current map generation, if prepared.
+    """
+    cached = _export_entry()
+    if cached is None or cached[2] in (EXPORT_BLOCKED, EXPORT_FAILED):
+        return None
+    if cached[1] is not None:
+        return cached[1]
+    view = st.session_state.get(EXPORT_VIEW_KEY)
+    if view is None or view[0] != cached[0]:
+        gz = get_cached_export_gz()
+        if gz is None:
+            return None
+        view = (cached[0], gzip.decompress(gz))
+        st.session_state[EXPORT_VIEW_KEY] = view
+    return view[1]
+
+
+def export_blocked() -> bool:
+    """
+    True if export of the current map generation failed validation.
+    """
+    cached = _export_entry()
+    return cached is not None and cached[2] == EXPORT_BLOCKED
+
+
+def export_failed() -> bool:
+    """
+    True if export of the current map generation failed for any other reason.
+    """
+    cached = _export_entry()
+    return cached is not None and cached[2] == EXPORT_FAILED
+
+
+def get_round_trip_status() -> Optional[str]:
+    """
+    "PASS" / "FAIL" for the current map generation, or None while pending.
+    A map that cannot be exported does not round-trip.
+    """
+    cached = _export_entry()
+    if cached is None:
+        return None
+    return "FAIL" if cached[2] in (EXPORT_BLOCKED, EXPORT_FAILED) else cached[2]
+
+
+def set_cached_export(gen: int, data: bytes, round_trip: str, gz: Optional[bytes] = None) -> None:
+    if gen != get_map_generation():
+        return
+    if not COMPACT_SESSION:
+        st.session_state[EXPORT_CACHE_KEY] = (gen, data, round_trip)
+        return
+    set_cached_export_gz(gen, gz if gz is not None else io_json.compress_gzip_bytes(data))
+    st.session_state[EXPORT_CACHE_KEY] = (gen, None, round_trip)
+    st.session_state[EXPORT_VIEW_KEY] = (gen, data)
+
+
+def set_export_failure(gen: int, reason: str) -> None:
+    if gen == get_map_generation():
+        st.session_state[EXPORT_CACHE_KEY] = (gen, None, reason)
+
+
+def get_cached_export_gz() -> Optional[bytes]:
+    cached = st.session_state.get(EXPORT_GZ_CACHE_KEY)
+    if cached is None or cached[0] != get_map_generation():
+        return None
+    return cached[1]
+
+
+def set_cached_export_gz(gen: int, data: bytes) -> None:
+    if gen == get_map_generation():
+        st.session_state[EXPORT_GZ_CACHE_KEY] = (gen, data)
+
+
+def last_import_file_id() -> Optional[str]:
+    return st.session_state.get(IMPORT_FILE_ID_KEY)
+
+
+def set_last_import_file_id(file_id: Optional[str]) -> None:
+    st.session_state[IMPORT_FILE_ID_KEY] = file_id
+
+
+# Compare view: last computed diff, keyed by (uploaded file_id, map generation).
+COMPARE_KEY = "ifs_mapper_v1_compare"
+
+
+def get_compare_result(file_id: str) -> Optional[Dict[str, Any]]:
+    cached = st.session_state.get(COMPARE_KEY)
+    if cached is None or cached[0] != (file_id, get_map_generation()):
+        return None
+    return cached[1]
+
+
+def set_compare_result(file_id: Optional[str], result: Optional[Dict[str, Any]]) -> None:
+    if file_id is None or result is None:
+        st.session_state.pop(COMPARE_KEY, None)
+        return
+    st.session_state[COMPARE_KEY] = ((file_id, get_map_generation()), result)
+
+
+# Streamlit keeps an uploaded file's bytes for as long as its widget holds
+# it. Compact mode rotates the uploader key after each import so the bytes
+# are released (and not re-imported on every rerun).
+UPLOADER_GEN_KEY = "ifs_mapper_v1_uploader_gen"
+
+
+def uploader_key() -> str:
+    return f"ifs_mapper_v1_uploader_{st.session_state.get(UPLOADER_GEN_KEY, 0)}"
+
+
+def release_uploaded_file() -> None:
+    if COMPACT_SESSION:
+        st.session_state[UPLOADER_GEN_KEY] = st.session_state.get(UPLOADER_GEN_KEY, 0) + 1
+
+
+# =========================
+# Per-session Memory Accounting (sizes only, no content)
+# =========================
+
+def _check_map_cap(n_bytes: int) -> None:
+    if SESSION_MAP_MAX_BYTES and n_bytes > SESSION_MAP_MAX_BYTES:
+        raise ValidationError([ValidationIssue(code="SESSION_MEMORY_LIMIT", path="$")])
+
+
+def _approx_bytes(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Estimated deep size of a MapModel-like graph (dataclasses with slots,
+    lists, tuples, dicts, scalars). Shared objects are counted once.
+    """
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, (str, bytes, int, float, bool)) or o is None:
+            continue
+        if isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        else:
+            for name in getattr(type(o), "__slots__", ()):
+                if name != "__weakref__" and hasattr(o, name):
+                    stack.append(getattr(o, name))
+    return total
+
+
+def session_memory_report() -> Dict[str, Any]:
+    """
+    Approximate bytes held by this session's map/issues storage.
+    """
+    if COMPACT_SESSION:
+        blob = st.session_state.get(MAP_BLOB_KEY)
+        view = st.session_state.get(MAP_VIEW_KEY)
+        issues_blob = st.session_state.get(ISSUES_BLOB_KEY)
+        map_bytes = len(blob) if blob else 0
+        view_bytes = _approx_bytes(view) if view is not None else 0
+        export_view = st.session_state.get(EXPORT_VIEW_KEY)
+        view_bytes += len(export_view[1]) if export_view is not None else 0
+        issues_bytes = len(issues_blob) if issues_blob else 0
+    else:
+        m = st.session_state.get(MAP_KEY)
+        map_bytes = _approx_bytes(m) if m is not None else 0
+        view_bytes = 0
+        issues_bytes = _approx_bytes(st.session_state.get(ISSUES_KEY, []))
+    cached = st.session_state.get(EXPORT_CACHE_KEY)
+    export_bytes = len(cached[1]) if cached is not None and cached[1] is not None else 0
+    cached_gz = st.session_state.get(EXPORT_GZ_CACHE_KEY)
+    export_bytes += len(cached_gz[1]) if cached_gz is not None else 0
+    return {
+        "mode": "compact" if COMPACT_SESSION else "full",
+        "map_bytes": map_bytes,
+        "derived_view_bytes": view_bytes,
+        "issues_bytes": issues_bytes,
+        "export_cache_bytes": export_bytes,
+        "total_bytes": map_bytes + view_bytes + issues_bytes + export_bytes,
+        "map_cap_bytes": SESSION_MAP_MAX_BYTES,
+    }
+
+
+# =========================
+# Developer Rerun Profiler (session-local, content-free)
+# =========================
+
+DEV_RERUN_KEY = "ifs_mapper_v1_dev_rerun"
+DEV_HISTORY_KEY = "ifs_mapper_v1_dev_history"
+DEV_HISTORY_MAX = 20
+
+
+def begin_dev_rerun() -> None:
+    st.session_state[DEV_RERUN_KEY] = {"sections_ms": {}, "payload_bytes": 0}
+
+
+def add_dev_timing(name: str, seconds: float) -> None:
+    cur = st.session_state.get(DEV_RERUN_KEY)
+    if cur is None:
+        return
+    sections: Dict[str, float] = cur["sections_ms"]
+    sections[name] = sections.get(name, 0.0) + seconds * 1000.0
+
+
+def add_dev_payload(n_bytes: int) -> None:
+    cur = st.session_state.get(DEV_RERUN_KEY)
+    if cur is None:
+        return
+    cur["payload_bytes"] += int(n_bytes)
+
+
+def end_dev_rerun(total_seconds: float) -> Dict[str, Any]:
+    cur = st.session_state.get(DEV_RERUN_KEY) or {"sections_ms": {}, "payload_bytes": 0}
+    cur["total_ms"] = total_seconds * 1000.0
+    history: List[Dict[str, Any]] = st.session_state.get(DEV_HISTORY_KEY, [])
+    history.append(cur)
+    st.session_state[DEV_HISTORY_KEY] = history[-DEV_HISTORY_MAX:]
+    st.session_state[DEV_RERUN_KEY] = None
+    return cur
+
+
+def get_dev_history() -> List[Dict[str, Any]]:
+    return st.session_state.get(DEV_HISTORY_KEY, [])